@@ -0,0 +1,291 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks import quiet
+from binarytree import ParkingLotTree
+from binarytreeparkinglot import ParkingLotSystem, ParkingSpot as TreeParkingSpot
+from events import NullSink
+from linkedlist import ParkingOrderManager
+from parkinglot import ParkingLotManager, SpotType
+from parkinglottreeimplementation import ParkingTree
+
+SIZES = [1_000, 100_000, 1_000_000]
+WORKLOADS = ["lookup", "park", "price", "available", "release"]
+SAMPLE_OPS = 10_000
+# At most this share of the lot is parked, so `available` never times an empty (fully prunable) listing
+MAX_PARKED_FRACTION = 0.5
+LISTING_REPEATS = 3
+
+
+# Engines with a bulk constructor report "bulk_load"; the rest add spots one by one and report "bulk_insert"
+class ListEngine:
+    """parkinglot.ParkingLotManager"""
+    name = "parkinglot"
+    build_workload = "bulk_insert"
+
+    def build(self, size):
+        spot_types = list(SpotType)
+        self.spot_types = spot_types
+        self.manager = ParkingLotManager(sink=NullSink())
+        for i in range(size):
+            self.manager.add_parking_spot(f"S{i}", spot_types[i % len(spot_types)], 10.0)
+        self.records = {}
+        self.fees = {}
+
+    def lookup(self, i):
+        self.manager.get_spot(f"S{i}")
+
+    def park(self, i):
+        self.records[i] = self.manager.park_vehicle(f"V{i}", self.spot_types[i % len(self.spot_types)])
+
+    def price(self, i):
+        self.fees[i] = self.manager.calculate_fee(self.records[i])
+
+    def available(self):
+        return [spot.spot_id for spot in self.manager.parking_spots if spot.available]
+
+    def release(self, i):
+        self.manager.release_vehicle(self.records.pop(i), self.fees.pop(i))
+
+
+class RecursiveTreeEngine:
+    """binarytree.ParkingLotTree"""
+    name = "binarytree"
+    build_workload = "bulk_load"
+
+    def build(self, size):
+        self.tree = ParkingLotTree.from_spots(((i, 10.0) for i in range(size)), NullSink())
+
+    def lookup(self, i):
+        self.tree.find_spot(i)
+
+    def park(self, i):
+        self.tree.park_vehicle(i)
+
+    def price(self, i):
+        self.tree.calculate_dynamic_price(i)
+
+    def available(self):
+        return self.tree.get_available_spots()
+
+    def release(self, i):
+        self.tree.remove_vehicle(i)
+
+
+class IterativeTreeEngine:
+    """binarytreeparkinglot.ParkingLotSystem"""
+    name = "binarytreeparkinglot"
+    build_workload = "bulk_load"
+
+    def build(self, size):
+        self.system = ParkingLotSystem.from_spots(TreeParkingSpot(i, i // 1000, "A", 10.0) for i in range(size))
+
+    def lookup(self, i):
+        self.system.find_spot(i)
+
+    def park(self, i):
+        self.system.occupy_spot(i, time.time())
+
+    def price(self, i):
+        self.system.calculate_dynamic_price(self.system.find_spot(i))
+
+    def available(self):
+        return self.system.get_available_spots()
+
+    def release(self, i):
+        self.system.release_spot(i, time.time())
+
+
+class OrderListEngine:
+    """linkedlist.ParkingOrderManager; each active order stands in for an occupied spot"""
+    name = "linkedlist"
+    build_workload = "bulk_insert"
+
+    def build(self, size):
+        # Pre-fill half the capacity so park/release run against a populated list
+        self.manager = ParkingOrderManager(size * 2)
+        for i in range(size):
+            self.manager.add_order(f"BASE{i}", "09:00", 10.0)
+
+    def lookup(self, i):
+        self.manager.get_order(f"BASE{i}")
+
+    def park(self, i):
+        self.manager.add_order(f"V{i}", "10:00", 10.0)
+
+    def price(self, i):
+        self.manager.get_order(f"V{i}").dynamic_price
+
+    def release(self, i):
+        self.manager.remove_order(f"V{i}", "11:00")
+
+
+class HierarchyEngine:
+    """parkinglottreeimplementation.ParkingTree, 10 zones x 10 floors"""
+    name = "parkinglottreeimplementation"
+    build_workload = "bulk_insert"
+
+    def build(self, size):
+        self.tree = ParkingTree()
+        floors = []
+        for zone_index in range(10):
+            zone = self.tree.add_zone(f"Zone {zone_index}", 10.0)
+            floors.extend(self.tree.add_floor(zone, f"Floor {zone_index}-{f}", 10.0) for f in range(10))
+        self.spots = [self.tree.add_spot(floors[i % len(floors)], f"Spot {i}", 10.0) for i in range(size)]
+
+    def lookup(self, i):
+        self.spots[i]
+
+    def park(self, i):
+        self.spots[i].update_occupancy(1)
+
+    def price(self, i):
+        self.spots[i].current_price()
+
+    def available(self):
+        return [node.name for node, _ in self.tree.iter_structure()
+                if not node.children and node.capacity == 1 and node.occupancy == 0]
+
+    def release(self, i):
+        self.spots[i].update_occupancy(0)
+
+
+ENGINES = [ListEngine, RecursiveTreeEngine, IterativeTreeEngine, OrderListEngine, HierarchyEngine]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(engine, size, workload, latencies_ns):
+    latencies_ns = sorted(latencies_ns)
+    total_seconds = sum(latencies_ns) / 1e9
+    return {
+        "engine": engine,
+        "size": size,
+        "workload": workload,
+        "ops": len(latencies_ns),
+        "ops_per_sec": len(latencies_ns) / total_seconds if total_seconds else None,
+        "p50_us": percentile(latencies_ns, 0.50) / 1e3,
+        "p99_us": percentile(latencies_ns, 0.99) / 1e3,
+        "peak_mb": None,
+    }
+
+
+def run_engine(engine_class, size, measure_memory=True):
+    """Drive every supported workload through one engine at one size"""
+    results = []
+    peak_bytes = None
+    if measure_memory:
+        tracemalloc.start()
+        engine_class().build(size)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    engine = engine_class()
+    start = time.perf_counter_ns()
+    engine.build(size)
+    build_ns = time.perf_counter_ns() - start
+    # The bulk load is timed as a whole, so it has a rate and peak memory but no per-op percentiles
+    results.append({
+        "engine": engine.name,
+        "size": size,
+        "workload": engine.build_workload,
+        "ops": size,
+        "ops_per_sec": size / (build_ns / 1e9) if build_ns else None,
+        "p50_us": None,
+        "p99_us": None,
+        "peak_mb": peak_bytes / 2**20 if peak_bytes is not None else None,
+    })
+
+    sample = random.Random(size).sample(range(size), min(int(size * MAX_PARKED_FRACTION), SAMPLE_OPS))
+    for workload in WORKLOADS:
+        operation = getattr(engine, workload, None)
+        if operation is None:
+            continue
+        latencies = []
+        if workload == "available":
+            for _ in range(LISTING_REPEATS):
+                start = time.perf_counter_ns()
+                operation()
+                latencies.append(time.perf_counter_ns() - start)
+        else:
+            for i in sample:
+                start = time.perf_counter_ns()
+                operation(i)
+                latencies.append(time.perf_counter_ns() - start)
+        results.append(summarize(engine.name, size, workload, latencies))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    baseline_rates = {}
+    if baseline:
+        baseline_rates = {(row["engine"], row["size"], row["workload"]): row["ops_per_sec"]
+                          for row in baseline["results"]}
+
+    print(f"{'engine':<30}{'size':>10} {'workload':<12}{'ops/sec':>14}{'p50 us':>12}{'p99 us':>12}{'peak MB':>10}"
+          + (f"{'vs base':>10}" if baseline else ""))
+    for row in results:
+        p50 = f"{row['p50_us']:12.2f}" if row["p50_us"] is not None else f"{'':>12}"
+        p99 = f"{row['p99_us']:12.2f}" if row["p99_us"] is not None else f"{'':>12}"
+        peak = f"{row['peak_mb']:10.1f}" if row["peak_mb"] is not None else f"{'':>10}"
+        line = (f"{row['engine']:<30}{row['size']:>10,} {row['workload']:<12}{row['ops_per_sec'] or 0:>14,.0f}"
+                f"{p50}{p99}{peak}")
+        previous = baseline_rates.get((row["engine"], row["size"], row["workload"]))
+        if previous and row["ops_per_sec"]:
+            line += f"{row['ops_per_sec'] / previous:>9.2f}x"
+        print(line)
+    print("\nbulk_insert adds spots one at a time; bulk_load builds the structure with from_spots, "
+          "so the two are not directly comparable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every parking data structure on the same workloads")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--engines", nargs="+", choices=[engine.name for engine in ENGINES])
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare ops/sec against")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory pass")
+    args = parser.parse_args()
+
+    engines = [engine for engine in ENGINES if not args.engines or engine.name in args.engines]
+    results = []
+    with quiet():
+        for size in args.sizes:
+            for engine_class in engines:
+                results.extend(run_engine(engine_class, size, measure_memory=not args.no_memory))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
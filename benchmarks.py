@@ -0,0 +1,298 @@
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from binarytree import BalancedParkingLotTree, ParkingLotTree, ParkingNode as BSTNode
+from binarytreeparkinglot import ParkingLotSystem, ParkingSpot as TreeParkingSpot, TreeNode
+from mergeslots import ParkingLotManager as SortingManager, ParkingSpot as SortableSpot, keyed_merge_sort, merge_sort
+from events import NullSink
+from linkedlist import ParkingOrder
+from parkinglot import ConcurrentParkingLotManager, ParkingArray, ParkingLotManager, ParkingRecord, ParkingSpot, SpotType
+from parkinglottreeimplementation import ParkingNode as HierarchyNode
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the demo print() calls so only the data structure is measured"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_parking_lot(size):
+    manager = ParkingLotManager(sink=NullSink())
+    spot_types = list(SpotType)
+    with quiet():
+        for i in range(size):
+            manager.add_parking_spot(f"S{i}", spot_types[i % len(spot_types)], 10.0)
+    return manager
+
+
+def bench_parking_lot(size, operations=10_000):
+    """Average latency of park + fee + release on a lot of the given size"""
+    manager = build_parking_lot(size)
+    with quiet():
+        # Fill the standard spots so a linear scan would have to walk the whole lot
+        filled = 0
+        while manager.find_available_spot(SpotType.STANDARD):
+            manager.park_vehicle(f"FILL{filled}", SpotType.STANDARD)
+            filled += 1
+
+        start = time.perf_counter()
+        for i in range(operations):
+            manager.park_vehicle(f"CAR{i}", SpotType.ELECTRIC)
+            manager.exit_vehicle(f"CAR{i}")
+        elapsed = time.perf_counter() - start
+    return elapsed / operations
+
+
+def bench_tree(tree_class, spot_ids, lookups=10_000):
+    """Total insert time and average find_spot latency for one insertion order"""
+    tree = tree_class(NullSink())
+    with quiet():
+        start = time.perf_counter()
+        for spot_id in spot_ids:
+            tree.insert(spot_id, 10.0)
+        insert_time = time.perf_counter() - start
+
+    probes = random.Random(1).choices(spot_ids, k=lookups)
+    start = time.perf_counter()
+    for spot_id in probes:
+        tree.find_spot(spot_id)
+    return insert_time, (time.perf_counter() - start) / lookups
+
+
+def bench_bulk_load(size):
+    """Cold-start time of from_spots for both BST parking systems, from shuffled input"""
+    spot_ids = random.Random(0).sample(range(size), size)
+    tree_spots = [(spot_id, 10.0) for spot_id in spot_ids]
+    system_spots = [TreeParkingSpot(spot_id, spot_id // 1000, "A", 10.0) for spot_id in spot_ids]
+
+    start = time.perf_counter()
+    ParkingLotTree.from_spots(tree_spots, NullSink())
+    tree_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ParkingLotSystem.from_spots(system_spots)
+    return tree_time, time.perf_counter() - start
+
+
+def bench_parking_array(size):
+    """Available-electric count and rate sum: ParkingArray columns vs a list of ParkingSpot"""
+    spot_types = list(SpotType)
+    spots = []
+    parking_array = ParkingArray()
+    for i in range(size):
+        spot = ParkingSpot(f"S{i}", spot_types[i % len(spot_types)], 10.0)
+        spot.available = i % 3 != 0
+        spots.append(spot)
+        parking_array.add(spot)
+
+    start = time.perf_counter()
+    matching = [spot for spot in spots if spot.type == SpotType.ELECTRIC and spot.available]
+    len(matching), sum(spot.base_rate for spot in matching)
+    list_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parking_array.count(SpotType.ELECTRIC, True), parking_array.total_base_rate(SpotType.ELECTRIC, True)
+    return list_time, time.perf_counter() - start
+
+
+def check_sort_by_price(lots=50):
+    """sort_by_price must return exactly what the stable merge_sort returns, float ties included"""
+    # 15.0 * 1.3 and 13.0 * 1.5 share a view key, yet price at 22.43 and 22.42 with 30% of the zone occupied
+    tie = SortingManager()
+    tie.add_spots([SortableSpot(f"Z{i}", "Premium", "F1", 10.0, 1) for i in range(8)]
+                  + [SortableSpot("A", "Premium", "F1", 15.0, 3), SortableSpot("B", "Premium", "F1", 13.0, 5)])
+    managers = [tie]
+    for spot in tie.parking_spots[:3]:
+        tie.set_occupied(spot, True)
+
+    rng = random.Random(1)
+    for _ in range(lots):
+        manager = SortingManager()
+        manager.add_spots(SortableSpot(f"S{i}", rng.choice(["Premium", "Standard"]), "F1",
+                                       rng.choice([6.0, 7.0, 8.0, 13.0, 15.0]), rng.randint(1, 5))
+                          for i in range(rng.randint(1, 200)))
+        for spot in rng.sample(manager.parking_spots, len(manager.parking_spots) // 3):
+            manager.set_occupied(spot, True)
+        managers.append(manager)
+
+    for manager in managers:
+        expected = merge_sort(manager.parking_spots, manager.dynamic_price)
+        if manager.sort_by_price() != expected:
+            raise AssertionError("sort_by_price does not match merge_sort")
+
+
+def bench_sort_by_price(size):
+    """Sort by dynamic price: recursive merge_sort vs keyed_merge_sort vs sorted()"""
+    rng = random.Random(0)
+    manager = SortingManager()
+    manager.add_spots(SortableSpot(f"S{i}", rng.choice(["Premium", "Standard"]), "F1",
+                                   rng.choice([6.0, 7.0, 8.0, 15.0]), rng.randint(1, 5)) for i in range(size))
+
+    key_func = manager.dynamic_price
+
+    timings = {}
+    for name, sort in (("merge_sort", merge_sort), ("keyed_merge_sort", keyed_merge_sort),
+                       ("sorted", lambda spots, key_func: sorted(spots, key=key_func))):
+        start = time.perf_counter()
+        sort(manager.parking_spots, key_func)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def bench_settlement(sessions):
+    """End-of-day settlement: calculate_fee per record vs one calculate_fees batch"""
+    manager = build_parking_lot(sessions)
+    spot_types = list(SpotType)
+    records = [manager.park_vehicle(f"V{i}", spot_types[i % len(spot_types)]) for i in range(sessions)]
+
+    start = time.perf_counter()
+    scalar = [manager.calculate_fee(record) for record in records]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fees, _ = manager.calculate_fees(records)
+    batch_time = time.perf_counter() - start
+    assert list(fees) == scalar
+    return scalar_time, batch_time
+
+
+def stress_concurrent_gates(threads, spots_per_type=200, operations_per_thread=20_000):
+    """Hammer a ConcurrentParkingLotManager from several gate threads; returns ops/sec
+
+    Every thread parks and releases vehicles of random types. A spot handed to two
+    vehicles at once, or counters that do not return to zero, fail the run.
+    """
+    manager = ConcurrentParkingLotManager(sink=NullSink())
+    for spot_type in SpotType:
+        for i in range(spots_per_type):
+            manager.add_parking_spot(f"{spot_type.value}-{i}", spot_type, 10.0)
+
+    holders = {}
+    double_allocations = []
+    spot_types = list(SpotType)
+    previous_interval = sys.getswitchinterval()
+    # Switch threads far more often than usual to shake out check-then-act races
+    sys.setswitchinterval(1e-6)
+
+    def gate(gate_id):
+        rng = random.Random(gate_id)
+        parked = []
+        for i in range(operations_per_thread):
+            if parked and (len(parked) > 50 or rng.random() < 0.5):
+                record = parked.pop(rng.randrange(len(parked)))
+                del holders[record.spot_id]
+                manager.exit_vehicle(record.vehicle_id)
+                continue
+            try:
+                record = manager.park_vehicle(f"G{gate_id}-{i}", rng.choice(spot_types))
+            except ValueError:
+                continue
+            holder = holders.setdefault(record.spot_id, record.vehicle_id)
+            if holder != record.vehicle_id:
+                double_allocations.append((record.spot_id, holder, record.vehicle_id))
+            parked.append(record)
+        for record in parked:
+            del holders[record.spot_id]
+            manager.exit_vehicle(record.vehicle_id)
+
+    workers = [threading.Thread(target=gate, args=(gate_id,)) for gate_id in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    sys.setswitchinterval(previous_interval)
+
+    assert not double_allocations, f"spots handed out twice: {double_allocations[:5]}"
+    assert all(rate == 0.0 for rate in manager.occupancy_snapshot().values())
+    assert all(len(manager._free_spots[spot_type]) == spots_per_type for spot_type in SpotType)
+    return threads * operations_per_thread / elapsed
+
+
+MEMORY_SAMPLES = {
+    "parkinglot.ParkingSpot": lambda i: ParkingSpot(f"S{i}", SpotType.STANDARD, 10.0),
+    "parkinglot.ParkingRecord": lambda i: ParkingRecord(f"V{i}", f"S{i}", None),
+    "binarytree.ParkingNode": lambda i: BSTNode(i, 10.0),
+    "binarytreeparkinglot.ParkingSpot": lambda i: TreeParkingSpot(i, 1, "A", 10.0),
+    "binarytreeparkinglot.TreeNode": lambda i: TreeNode(TreeParkingSpot(i, 1, "A", 10.0)),
+    "linkedlist.ParkingOrder": lambda i: ParkingOrder(f"V{i}", "09:00", 10.0),
+    "mergeslots.ParkingSpot": lambda i: SortableSpot(f"S{i}", "Premium", "F1", 10.0, 1),
+    "parkinglottreeimplementation.ParkingNode": lambda i: HierarchyNode(f"Spot {i}", 10.0),
+}
+
+
+def bench_memory_per_object(count=100_000):
+    """Bytes allocated per instance of each spot, node and record class (ids and names included)"""
+    results = {}
+    for name, factory in MEMORY_SAMPLES.items():
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        objects = [factory(i) for i in range(count)]
+        allocated = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        # Leave out the list holding the objects
+        results[name] = (allocated - sys.getsizeof(objects)) / count
+        del objects
+    return results
+
+
+def main(sizes=SIZES):
+    print("parkinglot.ParkingLotManager: park + fee + release")
+    for size in sizes:
+        latency = bench_parking_lot(size)
+        print(f"{size:>10,} spots: {latency * 1e6:8.2f} us/op")
+
+    print("\nMemory per object")
+    for name, size in bench_memory_per_object().items():
+        print(f"{name:<42} {size:8.1f} bytes")
+
+    print("\nParkingArray aggregate (count + rate sum of available electric spots)")
+    for size in sizes:
+        list_time, array_time = bench_parking_array(size)
+        print(f"{size:>10,} spots: list scan {list_time * 1e3:8.2f} ms, columns {array_time * 1e3:8.2f} ms")
+
+    check_sort_by_price()
+    print("\nmergeslots: sort by dynamic price (sort_by_price checked against merge_sort)")
+    for size in sizes:
+        timings = bench_sort_by_price(size)
+        print(f"{size:>10,} spots: " + ", ".join(f"{name} {seconds:7.3f} s" for name, seconds in timings.items()))
+
+    print("\nParkingLotManager fee settlement")
+    for size in sizes:
+        scalar_time, batch_time = bench_settlement(size)
+        print(f"{size:>10,} sessions: calculate_fee {scalar_time:7.3f} s, calculate_fees {batch_time:7.3f} s")
+
+    print("\nConcurrentParkingLotManager: gate threads parking and releasing")
+    for threads in (1, 2, 4, 8):
+        print(f"{threads:>10} threads: {stress_concurrent_gates(threads):12,.0f} ops/sec")
+
+    print("\nbinarytree: insert all spots, then find_spot")
+    for size in sizes:
+        orders = {"sorted": list(range(size)), "random": random.Random(0).sample(range(size), size)}
+        for order, spot_ids in orders.items():
+            for tree_class in (ParkingLotTree, BalancedParkingLotTree):
+                try:
+                    insert_time, latency = bench_tree(tree_class, spot_ids)
+                except RecursionError:
+                    result = "RecursionError"
+                else:
+                    result = f"insert {insert_time:8.3f} s, find {latency * 1e6:8.2f} us/op"
+                print(f"{size:>10,} {order:<6} {tree_class.__name__:<22} {result}")
+
+    print("\nfrom_spots bulk load")
+    for size in sizes:
+        tree_time, system_time = bench_bulk_load(size)
+        print(f"{size:>10,} spots: ParkingLotTree {tree_time:6.3f} s, ParkingLotSystem {system_time:6.3f} s")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
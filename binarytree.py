@@ -1,23 +1,90 @@
+import gc
+from datetime import datetime
+from itertools import starmap
+from operator import itemgetter
+
+from events import ConsoleSink
+from tariffs import get_tariff
+
 class ParkingNode:
-    def __init__(self, spot_id, base_price, occupancy_status=False):
+    __slots__ = ("spot_id", "base_price", "occupancy_status", "entry_time", "left", "right", "height")
+
+    def __init__(self, spot_id, base_price, occupancy_status=False, entry_time=None):
         self.spot_id = spot_id
         self.base_price = base_price
         self.occupancy_status = occupancy_status
-        self.entry_time = None
+        self.entry_time = entry_time
         self.left = None
         self.right = None
+        self.height = 1
 
 class ParkingLotTree:
-    def __init__(self):
+    def __init__(self, sink=None, tariff=None):
         self.root = None
+        self.sink = sink or ConsoleSink()
+        self.tariff = tariff or get_tariff("binarytree")
         self.total_spots = 0
         self.occupied_spots = 0
+
+    @classmethod
+    def from_spots(cls, spots, sink=None, tariff=None):
+        """Bulk-load a perfectly balanced tree from (spot_id, base_price[, occupancy_status[, entry_time]]) tuples
+
+        Occupied spots loaded without an entry time are treated as parked from the time of loading.
+        """
+        loaded_at = datetime.now()
+        tree = cls(sink, tariff)
+        ordered = sorted(spots, key=itemgetter(0))
+        spot_ids = list(map(itemgetter(0), ordered))
+        if len(set(spot_ids)) != len(spot_ids):
+            ordered = tree._drop_duplicates(ordered)
+
+        # Nothing allocated here can be cyclic garbage, so skip the collections the allocation would
+        # trigger, then freeze the tree so later collections do not rescan it
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            nodes = list(starmap(ParkingNode, ordered))
+            for node in [node for node in nodes if node.occupancy_status]:
+                tree.occupied_spots += 1
+                if node.entry_time is None:
+                    node.entry_time = loaded_at
+            tree.total_spots = len(nodes)
+            if nodes:
+                tree.root = cls._build_balanced(nodes, 0, len(nodes) - 1)
+        finally:
+            if gc_enabled:
+                gc.freeze()
+                gc.enable()
+        return tree
+
+    def _drop_duplicates(self, ordered):
+        """Keep the first of each run of equal spot ids in sorted input, reporting the rest"""
+        unique = []
+        for spot in ordered:
+            if unique and unique[-1][0] == spot[0]:
+                self.sink.emit("error", "Error: Spot {spot_id} already exists", spot_id=spot[0])
+                continue
+            unique.append(spot)
+        return unique
+
+    @classmethod
+    def _build_balanced(cls, nodes, lo, hi):
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        if lo < mid:
+            node.left = cls._build_balanced(nodes, lo, mid - 1)
+        if mid < hi:
+            node.right = cls._build_balanced(nodes, mid + 1, hi)
+        # Halving at the middle gives an n-node subtree a height of n.bit_length()
+        node.height = (hi - lo + 1).bit_length()
+        return node
     
     def insert(self, spot_id, base_price):
         if not self.root:
             self.root = ParkingNode(spot_id, base_price)
             self.total_spots += 1
-            print(f"Created new parking spot {spot_id} with base price ${base_price:.2f}")
+            self._spot_created(spot_id, base_price)
             return True
             
         return self._insert_recursive(self.root, spot_id, base_price)
@@ -27,19 +94,23 @@ class ParkingLotTree:
             if node.left is None:
                 node.left = ParkingNode(spot_id, base_price)
                 self.total_spots += 1
-                print(f"Created new parking spot {spot_id} with base price ${base_price:.2f}")
+                self._spot_created(spot_id, base_price)
                 return True
             return self._insert_recursive(node.left, spot_id, base_price)
         elif spot_id > node.spot_id:
             if node.right is None:
                 node.right = ParkingNode(spot_id, base_price)
                 self.total_spots += 1
-                print(f"Created new parking spot {spot_id} with base price ${base_price:.2f}")
+                self._spot_created(spot_id, base_price)
                 return True
             return self._insert_recursive(node.right, spot_id, base_price)
-        print(f"Error: Spot {spot_id} already exists")
+        self.sink.emit("error", "Error: Spot {spot_id} already exists", spot_id=spot_id)
         return False
     
+    def _spot_created(self, spot_id, base_price):
+        self.sink.emit("spot_created", "Created new parking spot {spot_id} with base price ${base_price:.2f}",
+                       spot_id=spot_id, base_price=base_price)
+    
     def find_spot(self, spot_id):
         return self._find_recursive(self.root, spot_id)
     
@@ -54,54 +125,51 @@ class ParkingLotTree:
         """Calculate dynamic price based on occupancy rate and time of day"""
         occupancy_rate = self.occupied_spots / self.total_spots if self.total_spots > 0 else 0
         
-        time_multiplier = self._get_time_multiplier()
-        occupancy_multiplier = 1.0 + (occupancy_rate * 0.5)
+        tariff = self.tariff.current
+        time_multiplier = tariff.time_factor(datetime.now())
+        occupancy_multiplier = tariff.occupancy_factor(occupancy_rate)
         
         spot = self.find_spot(spot_id)
         if not spot:
-            print(f"Error: Spot {spot_id} not found")
+            self.sink.emit("error", "Error: Spot {spot_id} not found", spot_id=spot_id)
             return None
             
         dynamic_price = spot.base_price * base_multiplier * time_multiplier * occupancy_multiplier
         return round(dynamic_price, 2)
     
-    def _get_time_multiplier(self):
-        from datetime import datetime
-        current_hour = datetime.now().hour
-        
-        if (8 <= current_hour <= 10) or (16 <= current_hour <= 19):
-            return 1.5
-        elif current_hour >= 23 or current_hour <= 5:
-            return 0.7
-        return 1.0
+    def price_snapshot(self, base_multiplier=1.0):
+        """Current hourly price of every spot, in spot id order, computed in one traversal"""
+        occupancy_rate = self.occupied_spots / self.total_spots if self.total_spots > 0 else 0
+        tariff = self.tariff.current
+        time_multiplier = tariff.time_factor(datetime.now())
+        occupancy_multiplier = tariff.occupancy_factor(occupancy_rate)
+        return {node.spot_id: round(node.base_price * base_multiplier * time_multiplier * occupancy_multiplier, 2)
+                for node in self._iter_inorder()}
     
     def park_vehicle(self, spot_id):
-        from datetime import datetime
-        
         spot = self.find_spot(spot_id)
         if not spot:
-            print(f"Error: Spot {spot_id} not found")
+            self.sink.emit("error", "Error: Spot {spot_id} not found", spot_id=spot_id)
             return False
         if spot.occupancy_status:
-            print(f"Error: Spot {spot_id} is already occupied")
+            self.sink.emit("error", "Error: Spot {spot_id} is already occupied", spot_id=spot_id)
             return False
             
         spot.occupancy_status = True
         spot.entry_time = datetime.now()
         self.occupied_spots += 1
         current_price = self.calculate_dynamic_price(spot_id)
-        print(f"Vehicle parked in spot {spot_id}. Current rate: ${current_price:.2f}/hour")
+        self.sink.emit("vehicle_parked", "Vehicle parked in spot {spot_id}. Current rate: ${rate:.2f}/hour",
+                       spot_id=spot_id, rate=current_price)
         return True
     
     def remove_vehicle(self, spot_id):
-        from datetime import datetime
-        
         spot = self.find_spot(spot_id)
         if not spot:
-            print(f"Error: Spot {spot_id} not found")
+            self.sink.emit("error", "Error: Spot {spot_id} not found", spot_id=spot_id)
             return False
         if not spot.occupancy_status:
-            print(f"Error: Spot {spot_id} is already empty")
+            self.sink.emit("error", "Error: Spot {spot_id} is already empty", spot_id=spot_id)
             return False
             
         duration = datetime.now() - spot.entry_time
@@ -112,22 +180,91 @@ class ParkingLotTree:
         spot.entry_time = None
         self.occupied_spots -= 1
         
-        print(f"Vehicle removed from spot {spot_id}")
-        print(f"Duration: {hours:.2f} hours")
-        print(f"Total charge: ${final_price:.2f}")
+        self.sink.emit("vehicle_removed",
+                       "Vehicle removed from spot {spot_id}\nDuration: {hours:.2f} hours\nTotal charge: ${charge:.2f}",
+                       spot_id=spot_id, hours=hours, charge=final_price)
         return True
     
     def get_available_spots(self):
-        available_spots = []
-        self._inorder_available(self.root, available_spots)
-        return available_spots
+        return [node.spot_id for node in self._iter_inorder() if not node.occupancy_status]
+    
+    def _iter_inorder(self):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+    
+    def iter_range(self, lo, hi, available_only=True):
+        """Lazily yield spot IDs with lo <= spot_id <= hi in ID order
+
+        Subtrees entirely outside the range are never entered, so a band of k spots
+        costs O(log n + k). Either bound may be None for an open end.
+        """
+        for node in self._iter_between(lo, hi):
+            if not (available_only and node.occupancy_status):
+                yield node.spot_id
+    
+    def nearest_free(self, spot_id):
+        """The free spot whose ID is closest to spot_id (the lower one on a tie), or None
+
+        Walks successors upward and predecessors downward from spot_id in step,
+        skipping only the occupied spots between spot_id and the answer.
+        """
+        walks = [self._iter_between_desc(None, spot_id), self._iter_between(spot_id, None)]
+        best = None
+        while walks:
+            for walk in walks[:]:
+                node = next(walk, None)
+                if node is not None:
+                    candidate = (abs(node.spot_id - spot_id), node.spot_id)
+                # Each walk only moves further away, so stop it once it cannot beat the best
+                if node is None or (best is not None and candidate >= best):
+                    walks.remove(walk)
+                elif not node.occupancy_status:
+                    best = candidate
+                    walks.remove(walk)
+        return best[1] if best else None
+    
+    def _iter_between(self, lo, hi):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                if lo is not None and node.spot_id < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if hi is not None and node.spot_id > hi:
+                return
+            yield node
+            node = node.right
     
-    def _inorder_available(self, node, available_spots):
-        if node:
-            self._inorder_available(node.left, available_spots)
-            if not node.occupancy_status:
-                available_spots.append(node.spot_id)
-            self._inorder_available(node.right, available_spots)
+    def _iter_between_desc(self, lo, hi):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                if hi is not None and node.spot_id > hi:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            if not stack:
+                return
+            node = stack.pop()
+            if lo is not None and node.spot_id < lo:
+                return
+            yield node
+            node = node.left
     
     def display_parking_status(self):
         """Display current status of the parking lot"""
@@ -140,22 +277,97 @@ class ParkingLotTree:
         available = self.get_available_spots()
         print("\nAvailable spot IDs:", available)
         
+        prices = self.price_snapshot()
         print("\nCurrent pricing:")
         if available:
-            sample_price = self.calculate_dynamic_price(available[0])
-            print(f"Sample rate for spot {available[0]}: ${sample_price:.2f}/hour")
+            print(f"Sample rate for spot {available[0]}: ${prices[available[0]]:.2f}/hour")
         
         print("\nDetailed spot status:")
-        self._display_spots_recursive(self.root)
-        print("\n")
-    
-    def _display_spots_recursive(self, node):
-        if node:
-            self._display_spots_recursive(node.left)
+        for node in self._iter_inorder():
             status = "Occupied" if node.occupancy_status else "Available"
-            current_price = self.calculate_dynamic_price(node.spot_id)
-            print(f"Spot {node.spot_id}: {status} - Current rate: ${current_price:.2f}/hour")
-            self._display_spots_recursive(node.right)
+            print(f"Spot {node.spot_id}: {status} - Current rate: ${prices[node.spot_id]:.2f}/hour")
+        print("\n")
+
+
+class BalancedParkingLotTree(ParkingLotTree):
+    """AVL variant of ParkingLotTree: iterative and O(log n) deep even for sorted spot IDs"""
+
+    def insert(self, spot_id, base_price):
+        if not self.root:
+            return super().insert(spot_id, base_price)
+
+        path = []
+        current = self.root
+        while current:
+            path.append(current)
+            if spot_id < current.spot_id:
+                current = current.left
+            elif spot_id > current.spot_id:
+                current = current.right
+            else:
+                self.sink.emit("error", "Error: Spot {spot_id} already exists", spot_id=spot_id)
+                return False
+
+        parent = path[-1]
+        if spot_id < parent.spot_id:
+            parent.left = ParkingNode(spot_id, base_price)
+        else:
+            parent.right = ParkingNode(spot_id, base_price)
+        self.total_spots += 1
+        self._spot_created(spot_id, base_price)
+
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            subtree = self._rebalance(node)
+            if i == 0:
+                self.root = subtree
+            elif path[i - 1].left is node:
+                path[i - 1].left = subtree
+            else:
+                path[i - 1].right = subtree
+        return True
+
+    def find_spot(self, spot_id):
+        current = self.root
+        while current and current.spot_id != spot_id:
+            current = current.left if spot_id < current.spot_id else current.right
+        return current
+
+    @staticmethod
+    def _height(node):
+        return node.height if node else 0
+
+    def _update_height(self, node):
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update_height(node)
+        self._update_height(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update_height(node)
+        self._update_height(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        self._update_height(node)
+        balance = self._height(node.left) - self._height(node.right)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
 
 
 def run_demo():
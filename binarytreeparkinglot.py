@@ -1,4 +1,13 @@
+import gc
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+
+from tariffs import get_tariff
+
 class ParkingSpot:
+    __slots__ = ("spot_id", "floor", "section", "base_price", "is_occupied", "current_price", "occupation_time")
+
     def __init__(self, spot_id, floor, section, base_price):
         self.spot_id = spot_id
         self.floor = floor
@@ -9,39 +18,108 @@ class ParkingSpot:
         self.occupation_time = None
 
 class TreeNode:
+    __slots__ = ("parking_spot", "left", "right", "free_count")
+
     def __init__(self, parking_spot):
         self.parking_spot = parking_spot
         self.left = None
         self.right = None
+        # Number of free spots in the subtree rooted at this node
+        self.free_count = 0 if parking_spot.is_occupied else 1
         
 class ParkingLotSystem:
-    def __init__(self):
+    def __init__(self, tariff=None):
         self.root = None
+        self.tariff = tariff or get_tariff("binarytreeparkinglot")
         self.total_spots = 0
         self.occupied_spots = 0
+
+    @classmethod
+    def from_spots(cls, spots, tariff=None):
+        """Bulk-load a perfectly balanced tree from ParkingSpot objects"""
+        system = cls(tariff)
+        ordered = sorted(spots, key=attrgetter("spot_id"))
+        spot_ids = list(map(attrgetter("spot_id"), ordered))
+        if len(set(spot_ids)) != len(spot_ids):
+            ordered = [spot for i, spot in enumerate(ordered) if i == 0 or spot_ids[i - 1] != spot_ids[i]]
+
+        # Skip the collections the node allocation would trigger and freeze the loaded tree afterwards
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            nodes = list(map(TreeNode, ordered))
+            system.occupied_spots = sum(map(attrgetter("is_occupied"), ordered))
+            system.total_spots = len(nodes)
+            if nodes:
+                system.root = cls._build_balanced(nodes, 0, len(nodes) - 1)
+        finally:
+            if gc_enabled:
+                gc.freeze()
+                gc.enable()
+        return system
+
+    @classmethod
+    def _build_balanced(cls, nodes, lo, hi):
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        if lo < mid:
+            node.left = left = cls._build_balanced(nodes, lo, mid - 1)
+            node.free_count += left.free_count
+        if mid < hi:
+            node.right = right = cls._build_balanced(nodes, mid + 1, hi)
+            node.free_count += right.free_count
+        return node
+
+    @staticmethod
+    def _free_count(node):
+        return node.free_count if node else 0
         
     def insert_spot(self, spot):
         if not self.root:
             self.root = TreeNode(spot)
             self.total_spots += 1
+            if spot.is_occupied:
+                self.occupied_spots += 1
             return True
-            
+
+        path = []
         current = self.root
         while True:
+            path.append(current)
             if spot.spot_id < current.parking_spot.spot_id:
                 if current.left is None:
                     current.left = TreeNode(spot)
-                    self.total_spots += 1
-                    return True
+                    break
                 current = current.left
             elif spot.spot_id > current.parking_spot.spot_id:
                 if current.right is None:
                     current.right = TreeNode(spot)
-                    self.total_spots += 1
-                    return True
+                    break
                 current = current.right
             else:
                 return False
+
+        self.total_spots += 1
+        if spot.is_occupied:
+            self.occupied_spots += 1
+        else:
+            for node in path:
+                node.free_count += 1
+        return True
+
+    def _find_path(self, spot_id):
+        """Nodes on the search path from the root down to spot_id, or None if it is missing"""
+        path = []
+        current = self.root
+        while current:
+            path.append(current)
+            if spot_id == current.parking_spot.spot_id:
+                return path
+            elif spot_id < current.parking_spot.spot_id:
+                current = current.left
+            else:
+                current = current.right
+        return None
     
     def find_spot(self, spot_id):
         current = self.root
@@ -53,79 +131,176 @@ class ParkingLotSystem:
             else:
                 current = current.right
         return None
+
+    def first_free_spot(self, min_spot_id=None):
+        """First free spot whose id is >= min_spot_id (or the first free spot overall)"""
+        # Nodes at or after min_spot_id where the search went left, deepest (smallest id) last
+        candidates = []
+        current = self.root
+        while current:
+            if min_spot_id is None or current.parking_spot.spot_id >= min_spot_id:
+                candidates.append(current)
+                current = current.left
+            else:
+                current = current.right
+
+        for node in reversed(candidates):
+            if not node.parking_spot.is_occupied:
+                return node.parking_spot
+            if self._free_count(node.right):
+                return self._leftmost_free(node.right)
+        return None
+
+    def _leftmost_free(self, node):
+        while node:
+            if self._free_count(node.left):
+                node = node.left
+            elif not node.parking_spot.is_occupied:
+                return node.parking_spot
+            else:
+                node = node.right
+        return None
+
+    def kth_free_spot(self, k):
+        """The k-th free spot in id order (1-based), or None if fewer than k spots are free"""
+        current = self.root
+        if k < 1 or k > self._free_count(current):
+            return None
+        while current:
+            left_free = self._free_count(current.left)
+            if k <= left_free:
+                current = current.left
+                continue
+            k -= left_free
+            if not current.parking_spot.is_occupied:
+                if k == 1:
+                    return current.parking_spot
+                k -= 1
+            current = current.right
+        return None
+
+    def _free_before(self, spot_id, inclusive):
+        """Number of free spots with id < spot_id (<= when inclusive)"""
+        count = 0
+        current = self.root
+        while current:
+            current_id = current.parking_spot.spot_id
+            if current_id < spot_id or (inclusive and current_id == spot_id):
+                count += self._free_count(current.left)
+                if not current.parking_spot.is_occupied:
+                    count += 1
+                current = current.right
+            else:
+                current = current.left
+        return count
+
+    def count_free_in_range(self, low_id, high_id):
+        """Number of free spots with low_id <= id <= high_id"""
+        if low_id > high_id:
+            return 0
+        return self._free_before(high_id, True) - self._free_before(low_id, False)
+
+    def free_spots_in_range(self, low_id, high_id):
+        """Yield the free spots with low_id <= id <= high_id in id order"""
+        spot = self.first_free_spot(low_id)
+        while spot and spot.spot_id <= high_id:
+            yield spot
+            # Spot ids need not be integers, so resume from the rank of the spot just yielded
+            spot = self.kth_free_spot(self._free_before(spot.spot_id, True) + 1)
     
     def calculate_dynamic_price(self, spot):
 
         occupancy_rate = self.occupied_spots / self.total_spots
 
-        time_multiplier = 1.0
-        occupancy_multiplier = 1.0
-
-        if occupancy_rate > 0.8:
-            occupancy_multiplier = 1.5
-        elif occupancy_rate > 0.6:
-            occupancy_multiplier = 1.3
-        elif occupancy_rate > 0.4:
-            occupancy_multiplier = 1.1
+        tariff = self.tariff.current
+        time_multiplier = tariff.time_factor(datetime.now())
+        occupancy_multiplier = tariff.occupancy_factor(occupancy_rate)
 
         spot.current_price = spot.base_price * occupancy_multiplier * time_multiplier
         return spot.current_price
     
     def occupy_spot(self, spot_id, timestamp):
-        spot = self.find_spot(spot_id)
+        path = self._find_path(spot_id)
+        spot = path[-1].parking_spot if path else None
         if spot and not spot.is_occupied:
             spot.is_occupied = True
             spot.occupation_time = timestamp
             self.occupied_spots += 1
+            for node in path:
+                node.free_count -= 1
             self.calculate_dynamic_price(spot)
             return True
         return False
     
     def release_spot(self, spot_id, timestamp):
-        spot = self.find_spot(spot_id)
+        path = self._find_path(spot_id)
+        spot = path[-1].parking_spot if path else None
         if spot and spot.is_occupied:
             spot.is_occupied = False
             spot.occupation_time = None
             self.occupied_spots -= 1
+            for node in path:
+                node.free_count += 1
             self.calculate_dynamic_price(spot)
             return True
         return False
     
     def get_available_spots(self):
-        available_spots = []
-        def inorder_traversal(node):
-            if node:
-                inorder_traversal(node.left)
-                if not node.parking_spot.is_occupied:
-                    available_spots.append(node.parking_spot)
-                inorder_traversal(node.right)
-        
-        inorder_traversal(self.root)
-        return available_spots
+        return list(self.iter_available_spots())
 
-import time
+    def iter_available_spots(self, after_spot_id=None):
+        """Yield the free spots with id > after_spot_id (or all free spots) in id order
+
+        Walks an explicit stack, so depth is not limited by the recursion limit, and
+        skips every subtree whose free_count is zero. Seeking to after_spot_id is O(log n).
+        """
+        stack = []
+        current = self.root
+        while stack or current:
+            while current:
+                if not current.free_count:
+                    current = None
+                elif after_spot_id is not None and current.parking_spot.spot_id <= after_spot_id:
+                    current = current.right
+                else:
+                    stack.append(current)
+                    current = current.left
+            if not stack:
+                return
+            current = stack.pop()
+            if not current.parking_spot.is_occupied:
+                yield current.parking_spot
+            current = current.right
+
+    def page(self, after_spot_id=None, limit=100):
+        """One page of free spots after a cursor: (spots, cursor for the next page or None)"""
+        if limit < 1:
+            raise ValueError(f"Page limit must be at least 1, got {limit}")
+        spots = list(islice(self.iter_available_spots(after_spot_id), limit))
+        cursor = spots[-1].spot_id if len(spots) == limit else None
+        return spots, cursor
 
-parking_system = ParkingLotSystem()
+import time
 
-spots = [
-    ParkingSpot(101, 1, "A", 10.0),
-    ParkingSpot(102, 1, "A", 10.0),
-    ParkingSpot(103, 1, "B", 12.0),
-    ParkingSpot(201, 2, "A", 15.0),
-    ParkingSpot(202, 2, "B", 15.0),
-]
+if __name__ == "__main__":
+    spots = [
+        ParkingSpot(101, 1, "A", 10.0),
+        ParkingSpot(102, 1, "A", 10.0),
+        ParkingSpot(103, 1, "B", 12.0),
+        ParkingSpot(201, 2, "A", 15.0),
+        ParkingSpot(202, 2, "B", 15.0),
+    ]
 
-for spot in spots:
-    parking_system.insert_spot(spot)
+    parking_system = ParkingLotSystem.from_spots(spots)
 
-current_time = time.time()
+    current_time = time.time()
 
-print("Occupying spot 101:")
-parking_system.occupy_spot(101, current_time)
-spot = parking_system.find_spot(101)
-print(f"Spot 101 current price: ${spot.current_price:.2f}")
+    print("Occupying spot 101:")
+    parking_system.occupy_spot(101, current_time)
+    spot = parking_system.find_spot(101)
+    print(f"Spot 101 current price: ${spot.current_price:.2f}")
 
-available = parking_system.get_available_spots()
-print(f"\nAvailable spots: {len(available)}")
-for spot in available:
-    print(f"Spot {spot.spot_id}: ${spot.current_price:.2f}")
\ No newline at end of file
+    available = parking_system.get_available_spots()
+    print(f"\nAvailable spots: {len(available)}")
+    for spot in available:
+        print(f"Spot {spot.spot_id}: ${spot.current_price:.2f}")
@@ -0,0 +1,88 @@
+import json
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, TextIO, Tuple
+
+Event = Tuple[float, str, Dict[str, Any]]
+
+class EventSink(ABC):
+    """Receives structured operation events from the parking engines.
+
+    Each event has a name, a message template and the fields to fill it with;
+    sinks decide whether to format, buffer, persist or drop it.
+    """
+    @abstractmethod
+    def emit(self, event: str, template: str, **fields: Any) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+class ConsoleSink(EventSink):
+    """Prints each event's formatted message, reproducing the demo output"""
+    def emit(self, event: str, template: str, **fields: Any) -> None:
+        print(template.format(**fields))
+
+class NullSink(EventSink):
+    """Drops every event"""
+    def emit(self, event: str, template: str, **fields: Any) -> None:
+        pass
+
+class RingBufferSink(EventSink):
+    """Keeps the most recent events in memory"""
+    def __init__(self, capacity: int = 10_000):
+        self.events: Deque[Event] = deque(maxlen=capacity)
+
+    def emit(self, event: str, template: str, **fields: Any) -> None:
+        self.events.append((time.time(), event, fields))
+
+class JsonLinesSink(EventSink):
+    """Writes events as JSON lines from a background thread, in batches
+
+    emit() only enqueues; the writer thread flushes once batch_size events are
+    pending or flush_interval seconds have passed. close() drains the queue.
+    """
+    def __init__(self, output: Optional[TextIO] = None, batch_size: int = 1000, flush_interval: float = 1.0):
+        self.output = output or sys.stdout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[Event]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="JsonLinesSink", daemon=True)
+        self._writer.start()
+
+    def emit(self, event: str, template: str, **fields: Any) -> None:
+        self._queue.put((time.time(), event, fields))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+
+    def _run(self) -> None:
+        batch: List[Event] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item:
+                batch.append(item)
+            if item is None or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+            if item is None:
+                return
+
+    def _write(self, batch: List[Event]) -> None:
+        if not batch:
+            return
+        self.output.write("".join(
+            json.dumps({"ts": timestamp, "event": event, **fields}, default=str) + "\n"
+            for timestamp, event, fields in batch
+        ))
+        self.output.flush()
@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from events import NullSink
+from parkinglot import ParkingLotManager, ParkingRecord, SpotType
+
+PARK = "park"
+EXIT = "exit"
+
+class ParkingGateway:
+    """asyncio front end that serves many gate connections over one ParkingLotManager
+
+    Requests arriving within batch_window seconds are coalesced into one allocation
+    pass: exits are settled first so their spots can go straight to waiting parks.
+    A park that finds no free spot waits in a per-type FIFO until one is released
+    (backpressure); once max_waiting parks are queued, new ones are rejected.
+    """
+    def __init__(self, manager: ParkingLotManager, batch_window: float = 0.002, max_waiting: Optional[int] = None):
+        self.manager = manager
+        self.batch_window = batch_window
+        self.max_waiting = max_waiting
+        self.batches = 0
+        self._pending: List[Tuple[str, Any, asyncio.Future]] = []
+        self._pending_parks = 0
+        self._waiting: Dict[SpotType, Deque[Tuple[str, asyncio.Future]]] = {spot_type: deque() for spot_type in SpotType}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ParkingGateway":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the worker and cancel every request it has not answered; later requests raise RuntimeError"""
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        pending, self._pending = self._pending, []
+        self._pending_parks = 0
+        for _, _, future in pending:
+            future.cancel()
+        for waiters in self._waiting.values():
+            for _, future in list(waiters):
+                future.cancel()
+            waiters.clear()
+
+    async def park(self, vehicle_id: str, spot_type: SpotType) -> ParkingRecord:
+        """Park a vehicle, waiting for a spot of the requested type if none is free"""
+        if self.max_waiting is not None and self.waiting_count() >= self.max_waiting:
+            raise ValueError(f"Too many vehicles waiting, cannot admit {vehicle_id}")
+        return await self._submit(PARK, (vehicle_id, spot_type))
+
+    async def exit(self, record: ParkingRecord) -> float:
+        """Settle the fee for a parking record and free its spot"""
+        return await self._submit(EXIT, record)
+
+    async def status(self) -> Dict[str, Dict[str, Any]]:
+        """Occupancy and queue length per spot type"""
+        snapshot = self.manager.occupancy_snapshot()
+        return {
+            spot_type.value: {"occupancy_rate": snapshot[spot_type], "waiting": len(self._waiting[spot_type])}
+            for spot_type in SpotType
+        }
+
+    def waiting_count(self) -> int:
+        """Parks queued for a spot plus parks submitted in the current batch window"""
+        return sum(len(waiters) for waiters in self._waiting.values()) + self._pending_parks
+
+    def _submit(self, kind: str, payload: Any) -> asyncio.Future:
+        if self._worker is None or self._worker.done():
+            raise RuntimeError("Gateway is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((kind, payload, future))
+        if kind == PARK:
+            self._pending_parks += 1
+        self._wakeup.set()
+        return future
+
+    def _forget_waiter(self, waiters: Deque[Tuple[str, asyncio.Future]], entry: Tuple[str, asyncio.Future],
+                       future: asyncio.Future) -> None:
+        # A client that gave up must not keep holding a max_waiting slot
+        if future.cancelled():
+            try:
+                waiters.remove(entry)
+            except ValueError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let the rest of the batch window's requests arrive before allocating
+            await asyncio.sleep(self.batch_window)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            self._pending_parks = 0
+            self.batches += 1
+            self._process(batch)
+
+    def _process(self, batch: List[Tuple[str, Any, asyncio.Future]]) -> None:
+        for kind, payload, future in batch:
+            if kind == EXIT and not future.cancelled():
+                try:
+                    fee = self.manager.calculate_fee(payload)
+                    self.manager.release_vehicle(payload, fee)
+                except (KeyError, ValueError) as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(fee)
+
+        for kind, payload, future in batch:
+            if kind == PARK and not future.cancelled():
+                vehicle_id, spot_type = payload
+                waiters = self._waiting[spot_type]
+                entry = (vehicle_id, future)
+                waiters.append(entry)
+                future.add_done_callback(partial(self._forget_waiter, waiters, entry))
+
+        for spot_type, waiters in self._waiting.items():
+            while waiters and self.manager.find_available_spot(spot_type):
+                vehicle_id, future = waiters.popleft()
+                if future.cancelled():
+                    continue
+                try:
+                    record = self.manager.park_vehicle(vehicle_id, spot_type)
+                except ValueError as error:
+                    # e.g. the plate is already parked; fail this waiter, not the worker
+                    future.set_exception(error)
+                else:
+                    future.set_result(record)
+
+
+async def fake_gate(gateway: ParkingGateway, gate_id: int, visits: int, latencies: List[float],
+                    rng: random.Random) -> None:
+    """In-process stand-in for a gate client: park, stay a moment, exit"""
+    spot_types = list(SpotType)
+    for visit in range(visits):
+        start = time.perf_counter()
+        record = await gateway.park(f"G{gate_id}-{visit}", rng.choice(spot_types))
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(rng.uniform(0, 0.01))
+        start = time.perf_counter()
+        await gateway.exit(record)
+        latencies.append(time.perf_counter() - start)
+
+
+async def demo(gates: int = 2000, visits: int = 5, spots_per_type: int = 100) -> None:
+    manager = ParkingLotManager(sink=NullSink())
+    for spot_type in SpotType:
+        for i in range(spots_per_type):
+            manager.add_parking_spot(f"{spot_type.value}-{i}", spot_type, 10.0)
+
+    latencies: List[float] = []
+    rng = random.Random(7)
+    async with ParkingGateway(manager) as gateway:
+        start = time.perf_counter()
+        await asyncio.gather(*(fake_gate(gateway, gate_id, visits, latencies, rng) for gate_id in range(gates)))
+        elapsed = time.perf_counter() - start
+        status = await gateway.status()
+
+    latencies.sort()
+    print(f"{gates} gates x {visits} visits over {len(SpotType) * spots_per_type} spots in {elapsed:.2f} s")
+    print(f"Requests: {len(latencies):,} in {gateway.batches:,} batches ({len(latencies) / elapsed:,.0f} req/sec)")
+    print(f"Latency p50: {latencies[len(latencies) // 2] * 1e3:.1f} ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1e3:.1f} ms")
+    print(f"Final status: {status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
@@ -1,60 +1,67 @@
+from tariffs import get_tariff
+
 class ParkingOrder:
+    __slots__ = ("vehicle_id", "entry_time", "base_price", "dynamic_price", "prev", "next", "exit_time")
+
     def __init__(self, vehicle_id, entry_time, base_price):
         self.vehicle_id = vehicle_id
         self.entry_time = entry_time
         self.base_price = base_price
         self.dynamic_price = base_price
+        self.prev = None
         self.next = None
         self.exit_time = None
 
 class ParkingOrderManager:
-    def __init__(self, max_capacity):
+    def __init__(self, max_capacity, tariff=None):
         self.head = None
+        self.tariff = tariff or get_tariff("linkedlist")
         self.size = 0
         self.max_capacity = max_capacity
+        self.orders_by_vehicle = {}
     
     def add_order(self, vehicle_id, entry_time, base_price):
         if self.size >= self.max_capacity:
             print(f"Parking lot full! Cannot add order for vehicle {vehicle_id}")
             return False
+        if vehicle_id in self.orders_by_vehicle:
+            print(f"Vehicle {vehicle_id} already has an active order")
+            return False
             
         new_order = ParkingOrder(vehicle_id, entry_time, base_price)
 
         occupancy_rate = self.size / self.max_capacity
-        if occupancy_rate > 0.8:
-            new_order.dynamic_price = base_price * 1.5
-        elif occupancy_rate > 0.6:
-            new_order.dynamic_price = base_price * 1.25
+        surcharge = self.tariff.current.occupancy_factor(occupancy_rate)
+        if surcharge != 1.0:
+            new_order.dynamic_price = base_price * surcharge
 
         new_order.next = self.head
+        if self.head:
+            self.head.prev = new_order
         self.head = new_order
+        self.orders_by_vehicle[vehicle_id] = new_order
         self.size += 1
         return True
         
     def remove_order(self, vehicle_id, exit_time):
-        current = self.head
-        prev = None
-        
-        while current:
-            if current.vehicle_id == vehicle_id:
-                current.exit_time = exit_time
-                if prev:
-                    prev.next = current.next
-                else:
-                    self.head = current.next
-                self.size -= 1
-                return current
-            prev = current
-            current = current.next
-        return None
+        order = self.orders_by_vehicle.pop(vehicle_id, None)
+        if not order:
+            return None
+
+        order.exit_time = exit_time
+        if order.prev:
+            order.prev.next = order.next
+        else:
+            self.head = order.next
+        if order.next:
+            order.next.prev = order.prev
+        order.prev = None
+        order.next = None
+        self.size -= 1
+        return order
         
     def get_order(self, vehicle_id):
-        current = self.head
-        while current:
-            if current.vehicle_id == vehicle_id:
-                return current
-            current = current.next
-        return None
+        return self.orders_by_vehicle.get(vehicle_id)
         
     def display_orders(self):
         current = self.head
@@ -1,4 +1,13 @@
+from bisect import bisect_left, insort
+import heapq
+from itertools import chain, islice
+from operator import itemgetter
+
+from tariffs import get_tariff
+
 class ParkingSpot:
+    __slots__ = ("id", "zone", "floor", "base_price", "priority_level", "is_occupied", "occupancy_time")
+
     def __init__(self, id, zone, floor, base_price, priority_level=1):
         self.id = id
         self.zone = zone
@@ -8,9 +17,9 @@ class ParkingSpot:
         self.is_occupied = False
         self.occupancy_time = None
 
-    def calculate_dynamic_price(self, zone_occupancy_rate):
+    def calculate_dynamic_price(self, zone_occupancy_rate, tariff):
 
-        occupancy_multiplier = 1 + (0.5 * zone_occupancy_rate)
+        occupancy_multiplier = tariff.occupancy_factor(zone_occupancy_rate)
         priority_multiplier = 1 + (0.1 * self.priority_level)
         return round(self.base_price * occupancy_multiplier * priority_multiplier, 2)
 
@@ -48,35 +57,236 @@ def merge(left, right, key_func):
     result.extend(right[right_idx:])
     return result
 
-class ParkingLotManager:
+def keyed_merge_sort(parking_spots, key_func):
+    """Stable bottom-up merge sort that calls key_func once per spot.
+
+    Sorts positions by their precomputed keys, merging runs back and forth
+    between two index buffers instead of slicing, then maps positions back to spots.
+    """
+    keys = [key_func(spot) for spot in parking_spots]
+    n = len(keys)
+    src = list(range(n))
+    dst = [0] * n
+
+    width = 1
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            left_idx, right_idx = lo, mid
+            for out in range(lo, hi):
+                if right_idx >= hi or (left_idx < mid and keys[src[left_idx]] <= keys[src[right_idx]]):
+                    dst[out] = src[left_idx]
+                    left_idx += 1
+                else:
+                    dst[out] = src[right_idx]
+                    right_idx += 1
+        src, dst = dst, src
+        width *= 2
+
+    return [parking_spots[i] for i in src]
+
+class SortedView:
+    """Spots kept in (key, insertion order) order
+
+    Entries live in a list of sorted chunks of at most 2 * CHUNK_SIZE entries, plus
+    the last entry of every chunk. An update bisects to its chunk and shifts only
+    within it, so it costs O(log n + CHUNK_SIZE) rather than O(n).
+    """
+    CHUNK_SIZE = 512
+
     def __init__(self):
+        self.chunks = []
+        self.maxes = []
+
+    def insert(self, key, seq, spot):
+        entry = (key, seq, spot)
+        if not self.chunks:
+            self.chunks.append([entry])
+            self.maxes.append(entry)
+            return
+        i = min(bisect_left(self.maxes, entry), len(self.chunks) - 1)
+        chunk = self.chunks[i]
+        insort(chunk, entry)
+        self.maxes[i] = chunk[-1]
+        if len(chunk) > 2 * self.CHUNK_SIZE:
+            self.chunks[i + 1:i + 1] = [chunk[self.CHUNK_SIZE:]]
+            del chunk[self.CHUNK_SIZE:]
+            self.maxes[i:i + 1] = [chunk[-1], self.chunks[i + 1][-1]]
+
+    def remove(self, key, seq):
+        # (key, seq) sorts just before the full (key, seq, spot) entry
+        i = bisect_left(self.maxes, (key, seq))
+        chunk = self.chunks[i]
+        del chunk[bisect_left(chunk, (key, seq))]
+        if chunk:
+            self.maxes[i] = chunk[-1]
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+
+    def extend(self, entries):
+        """Add many (key, seq, spot) entries, in seq order and newer than any held, with one sort"""
+        # The sort is stable, so equal keys stay in seq order without comparing seqs
+        merged = sorted(chain(self.entries(), entries), key=itemgetter(0))
+        self.chunks = [merged[i:i + self.CHUNK_SIZE] for i in range(0, len(merged), self.CHUNK_SIZE)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+
+    def entries(self):
+        return chain.from_iterable(self.chunks)
+
+    def __iter__(self):
+        return (spot for _, _, spot in self.entries())
+
+class ParkingLotManager:
+    VIEWS = ("priority", "price", "availability")
+    PRICE_KEY_TOLERANCE = 1e-9
+
+    def __init__(self, tariff=None):
         self.parking_spots = []
+        self.tariff = tariff or get_tariff("mergeslots")
         self.zone_occupancy = {"Premium": 0.0, "Standard": 0.0}
+        self.zone_counts = {}
+        self.priority_view = SortedView()
+        self.availability_view = SortedView()
+        # Per-zone views ordered by the occupancy-independent part of the dynamic price;
+        # a zone's occupancy multiplier scales all of its spots alike, so zones are merged lazily
+        self.price_views = {}
+        self.available_price_views = {}
+        self.view_keys = {}
 
     def add_spot(self, spot):
-        self.parking_spots.append(spot)
+        self.add_spots([spot])
+
+    def add_spots(self, spots):
+        """Add many spots, sorting each view once instead of inserting spot by spot"""
+        priority_entries = []
+        availability_entries = []
+        price_entries = {}
+        available_price_entries = {}
+        for spot in spots:
+            seq = len(self.parking_spots)
+            self.parking_spots.append(spot)
+            counts = self.zone_counts.setdefault(spot.zone, [0, 0])
+            counts[0] += 1
+            if spot.is_occupied:
+                counts[1] += 1
+            self.zone_occupancy[spot.zone] = counts[1] / counts[0]
+
+            priority_entries.append(((-spot.priority_level, spot.base_price), seq, spot))
+            availability_key = (spot.is_occupied, -spot.priority_level)
+            availability_entries.append((availability_key, seq, spot))
+            price_key = self._price_key(spot)
+            price_entries.setdefault(spot.zone, []).append((price_key, seq, spot))
+            available_prices = available_price_entries.setdefault(spot.zone, [])
+            if not spot.is_occupied:
+                available_prices.append((price_key, seq, spot))
+            self.view_keys[id(spot)] = (seq, availability_key, spot.is_occupied)
+
+        self._extend_view(self.priority_view, priority_entries)
+        self._extend_view(self.availability_view, availability_entries)
+        for zone, entries in price_entries.items():
+            self._extend_view(self.price_views.setdefault(zone, SortedView()), entries)
+        for zone, entries in available_price_entries.items():
+            self._extend_view(self.available_price_views.setdefault(zone, SortedView()), entries)
+
+    @staticmethod
+    def _extend_view(view, entries):
+        if len(entries) == 1:
+            view.insert(*entries[0])
+        elif entries:
+            view.extend(entries)
+
+    def set_occupied(self, spot, occupied):
+        """Change a spot's occupancy and update the zone rate and sorted views in O(log n)"""
+        spot.is_occupied = occupied
+        self._sync_spot(spot)
+        counts = self.zone_counts[spot.zone]
+        self.zone_occupancy[spot.zone] = counts[1] / counts[0]
+
+    def _sync_spot(self, spot):
+        """Move a spot within the views if its occupancy differs from what they hold"""
+        seq, availability_key, was_occupied = self.view_keys[id(spot)]
+        if spot.is_occupied == was_occupied:
+            return
+        self.zone_counts[spot.zone][1] += 1 if spot.is_occupied else -1
+
+        self.availability_view.remove(availability_key, seq)
+        availability_key = (spot.is_occupied, -spot.priority_level)
+        self.availability_view.insert(availability_key, seq, spot)
+        available_prices = self.available_price_views[spot.zone]
+        if spot.is_occupied:
+            available_prices.remove(self._price_key(spot), seq)
+        else:
+            available_prices.insert(self._price_key(spot), seq, spot)
+        self.view_keys[id(spot)] = (seq, availability_key, spot.is_occupied)
+
+    @staticmethod
+    def _price_key(spot):
+        return spot.base_price * (1 + (0.1 * spot.priority_level))
 
     def update_zone_occupancy(self, zone):
         zone_spots = [spot for spot in self.parking_spots if spot.zone == zone]
+        # Pick up spots whose is_occupied flag was changed directly
+        for spot in zone_spots:
+            self._sync_spot(spot)
         occupied_spots = len([spot for spot in zone_spots if spot.is_occupied])
         total_spots = len(zone_spots)
         self.zone_occupancy[zone] = occupied_spots / total_spots if total_spots > 0 else 0.0
 
+    def iter_view(self, view, available_only=False):
+        """Lazily iterate spots in the order of one of the maintained VIEWS"""
+        if view == "price":
+            zone_views = self.available_price_views if available_only else self.price_views
+            priced = heapq.merge(*(self._iter_zone_prices(zone, zone_view) for zone, zone_view in zone_views.items()),
+                                 key=lambda entry: entry[:2])
+            return (spot for _, _, spot in priced)
+        if view == "priority":
+            spots = iter(self.priority_view)
+        elif view == "availability":
+            spots = iter(self.availability_view)
+        else:
+            raise ValueError(f"Unknown view: {view}")
+        return (spot for spot in spots if not (available_only and spot.is_occupied))
+
+    def _iter_zone_prices(self, zone, zone_view):
+        occupancy_rate = self.zone_occupancy[zone]
+        tariff = self.tariff.current
+        # The view key and the price multiply in a different order, so keys within float error of
+        # each other can price (and round) either way round; sort each such run by (price, seq)
+        run = []
+        previous_key = None
+        for key, seq, spot in zone_view.entries():
+            if run and key - previous_key > self.PRICE_KEY_TOLERANCE * abs(previous_key):
+                yield from sorted(run)
+                run = []
+            run.append((spot.calculate_dynamic_price(occupancy_rate, tariff), seq, spot))
+            previous_key = key
+        yield from sorted(run)
+
+    def top_k(self, view, k, available_only=False):
+        """The first k spots of a view, without materialising the full ordering"""
+        return self.page(view, 0, k, available_only)
+
+    def page(self, view, offset, limit, available_only=False):
+        """Spots at positions [offset, offset + limit) of a view"""
+        return list(islice(self.iter_view(view, available_only), offset, offset + limit))
+
     def sort_by_priority(self):
-        return merge_sort(self.parking_spots, 
-                         key_func=lambda x: (-x.priority_level, x.base_price))
+        return list(self.priority_view)
 
     def sort_by_price(self):
-        return merge_sort(self.parking_spots, 
-                         key_func=lambda x: x.calculate_dynamic_price(self.zone_occupancy[x.zone]))
+        return list(self.iter_view("price"))
 
     def sort_by_availability_and_priority(self):
-        return merge_sort(self.parking_spots, 
-                         key_func=lambda x: (x.is_occupied, -x.priority_level))
+        return list(self.availability_view)
+
+    def dynamic_price(self, spot):
+        return spot.calculate_dynamic_price(self.zone_occupancy[spot.zone], self.tariff.current)
 
     def display_spots(self, spots):
         for spot in spots:
-            dynamic_price = spot.calculate_dynamic_price(self.zone_occupancy[spot.zone])
+            dynamic_price = self.dynamic_price(spot)
             print(f"{spot} (Dynamic Price: ${dynamic_price})")
 
 def main():
@@ -96,11 +306,8 @@ def main():
         spot = ParkingSpot(id, zone, floor, price, priority)
         manager.add_spot(spot)
 
-    manager.parking_spots[0].is_occupied = True
-    manager.parking_spots[3].is_occupied = True  
-
-    manager.update_zone_occupancy("Premium")
-    manager.update_zone_occupancy("Standard")
+    manager.set_occupied(manager.parking_spots[0], True)
+    manager.set_occupied(manager.parking_spots[3], True)
 
     print("1. Sorted by Priority (High to Low):")
     priority_sorted = manager.sort_by_priority()
@@ -1,8 +1,17 @@
 from enum import Enum
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Optional, List
+from itertools import compress
+from typing import Any, Callable, Optional, List, Dict, Deque, Iterator, Tuple
+import os
+import threading
 import time
 
+from events import ConsoleSink, EventSink
+from tariffs import TariffEngine, get_tariff
+
 class SpotType(Enum):
     STANDARD = "standard"
     COMPACT = "compact"
@@ -10,6 +19,8 @@ class SpotType(Enum):
     ELECTRIC = "electric"
 
 class ParkingSpot:
+    __slots__ = ("spot_id", "type", "base_rate", "available")
+
     def __init__(self, spot_id: str, spot_type: SpotType, base_rate: float):
         self.spot_id = spot_id
         self.type = spot_type
@@ -17,147 +28,570 @@ class ParkingSpot:
         self.available = True
 
 class ParkingRecord:
+    __slots__ = ("vehicle_id", "spot_id", "entry_time")
+
     def __init__(self, vehicle_id: str, spot_id: str, entry_time: datetime):
         self.vehicle_id = vehicle_id
         self.spot_id = spot_id
         self.entry_time = entry_time
 
+SPOT_TYPES: List[SpotType] = list(SpotType)
+SPOT_TYPE_CODES: Dict[SpotType, int] = {spot_type: code for code, spot_type in enumerate(SPOT_TYPES)}
+
+class ParkingArraySpot:
+    """Live view of one spot stored in a ParkingArray
+
+    Reads come from the array's columns and assignments write straight back to
+    them, so the view behaves like the ParkingSpot it was stored from. It follows
+    the spot by id, so it stays valid when remove() moves the spot to another slot.
+    """
+    __slots__ = ("_array", "spot_id")
+
+    def __init__(self, parking_array: "ParkingArray", spot_id: str):
+        self._array = parking_array
+        self.spot_id = spot_id
+
+    @property
+    def type(self) -> SpotType:
+        return SPOT_TYPES[self._array._states[self._array._slots[self.spot_id]] >> 1]
+
+    @type.setter
+    def type(self, spot_type: SpotType) -> None:
+        slot = self._array._slots[self.spot_id]
+        self._array._states[slot] = SPOT_TYPE_CODES[spot_type] << 1 | self._array._states[slot] & 1
+
+    @property
+    def base_rate(self) -> float:
+        return self._array._rates[self._array._slots[self.spot_id]]
+
+    @base_rate.setter
+    def base_rate(self, base_rate: float) -> None:
+        self._array._rates[self._array._slots[self.spot_id]] = base_rate
+
+    @property
+    def available(self) -> bool:
+        return bool(self._array._states[self._array._slots[self.spot_id]] & 1)
+
+    @available.setter
+    def available(self, available: bool) -> None:
+        self._array.set_available(self.spot_id, available)
+
 class ParkingArray:
-    """Custom Array implementation for parking management"""
+    """Column-oriented array of parking spots
+
+    Each spot is stored as one slot across parallel columns: its id, its base rate
+    (array of doubles) and a state byte packing the spot type code with the
+    availability bit. Whole-lot counts, filters and sums run over those columns in C.
+    """
     def __init__(self):
-        self._spots = [None] * 10
-        self._size = 0
+        self._ids: List[str] = []
+        self._rates = array("d")
+        self._states = bytearray()
+        self._slots: Dict[str, int] = {}
 
     def add(self, spot: ParkingSpot) -> None:
         """Add a parking spot to the array"""
-        if self._size == len(self._spots):
-            self._resize()
-        self._spots[self._size] = spot
-        self._size += 1
+        if spot.spot_id in self._slots:
+            raise ValueError(f"Parking spot {spot.spot_id} already exists")
+        self._slots[spot.spot_id] = len(self._ids)
+        self._ids.append(spot.spot_id)
+        self._rates.append(spot.base_rate)
+        self._states.append(SPOT_TYPE_CODES[spot.type] << 1 | spot.available)
 
     def remove(self, spot_id: str) -> bool:
-        """Remove a parking spot by its ID"""
-        for i in range(self._size):
-            if self._spots[i].spot_id == spot_id:
-                for j in range(i, self._size - 1):
-                    self._spots[j] = self._spots[j + 1]
-                self._spots[self._size - 1] = None
-                self._size -= 1
-                return True
-        return False
-
-    def get(self, index: int) -> Optional[ParkingSpot]:
-        """Get a parking spot by index"""
-        if 0 <= index < self._size:
-            return self._spots[index]
-        raise IndexError(f"Index {index} is out of bounds for size {self._size}")
+        """Remove a parking spot by its ID, moving the last spot into its slot"""
+        slot = self._slots.pop(spot_id, None)
+        if slot is None:
+            return False
+        last_id = self._ids.pop()
+        last_rate = self._rates.pop()
+        last_state = self._states.pop()
+        if slot < len(self._ids):
+            self._ids[slot] = last_id
+            self._rates[slot] = last_rate
+            self._states[slot] = last_state
+            self._slots[last_id] = slot
+        return True
+
+    def get(self, index: int) -> Optional[ParkingArraySpot]:
+        """Get a write-through view of the parking spot stored at index"""
+        if 0 <= index < len(self._ids):
+            return ParkingArraySpot(self, self._ids[index])
+        raise IndexError(f"Index {index} is out of bounds for size {len(self._ids)}")
+
+    def find(self, spot_id: str) -> Optional[ParkingArraySpot]:
+        """Get a write-through view of a parking spot by its ID"""
+        return ParkingArraySpot(self, spot_id) if spot_id in self._slots else None
+
+    def set_available(self, spot_id: str, available: bool) -> None:
+        """Update the availability flag of a parking spot in place"""
+        slot = self._slots[spot_id]
+        self._states[slot] = self._states[slot] & ~1 | available
 
     def size(self) -> int:
         """Get current size of the array"""
-        return self._size
+        return len(self._ids)
+
+    def count(self, spot_type: Optional[SpotType] = None, available: Optional[bool] = None) -> int:
+        """Count spots matching the given type and/or availability"""
+        return self._states.translate(self._mask_table(spot_type, available)).count(1)
+
+    def spot_ids(self, spot_type: Optional[SpotType] = None, available: Optional[bool] = None) -> List[str]:
+        """IDs of the spots matching the given type and/or availability, in slot order"""
+        return list(compress(self._ids, self._states.translate(self._mask_table(spot_type, available))))
+
+    def total_base_rate(self, spot_type: Optional[SpotType] = None, available: Optional[bool] = None) -> float:
+        """Sum of base rates over the spots matching the given type and/or availability"""
+        return sum(compress(self._rates, self._states.translate(self._mask_table(spot_type, available))))
+
+    @staticmethod
+    def _mask_table(spot_type: Optional[SpotType], available: Optional[bool]) -> bytes:
+        """Translation table mapping every state byte to 1 if it matches the filter, else 0"""
+        return bytes(
+            (spot_type is None or state >> 1 == SPOT_TYPE_CODES[spot_type])
+            and (available is None or bool(state & 1) == available)
+            for state in range(256)
+        )
+
+FEE_BREAKDOWN = (
+    "\nParking Fee Breakdown for vehicle {vehicle_id}:\n"
+    "Duration: {hours} hours\n"
+    "Base rate: ${base_rate}/hour\n"
+    "Time factor: {time_factor}x (based on parking time)\n"
+    "Occupancy factor: {occupancy_factor}x (based on {occupancy_rate:.1%} occupancy)\n"
+    "Total fee: ${fee:.2f}"
+)
+
+EPOCH = datetime(1970, 1, 1)
+
+class CompletedSession:
+    __slots__ = ("vehicle_id", "spot_id", "entry_time", "exit_time", "fee")
+
+    def __init__(self, vehicle_id: str, spot_id: str, entry_time: datetime, exit_time: datetime, fee: float):
+        self.vehicle_id = vehicle_id
+        self.spot_id = spot_id
+        self.entry_time = entry_time
+        self.exit_time = exit_time
+        self.fee = fee
+
+class SessionSegment:
+    """Completed sessions that ended within one time bucket
+
+    count and revenue stay in memory for the life of the history. sessions is
+    None once the segment has been spilled to path or evicted outright.
+    """
+    __slots__ = ("start", "sessions", "count", "revenue", "path")
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.sessions: Optional[List[CompletedSession]] = []
+        self.count = 0
+        self.revenue = 0.0
+        self.path: Optional[str] = None
+
+    def add(self, session: CompletedSession) -> None:
+        self.count += 1
+        self.revenue += session.fee
+        if self.sessions is not None:
+            self.sessions.append(session)
+        elif self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as spill_file:
+                spill_file.write(SessionHistory.format_session(session))
+
+    def load(self) -> List[CompletedSession]:
+        """The segment's sessions, read back from disk if it was spilled"""
+        if self.sessions is not None:
+            return self.sessions
+        if self.path is None:
+            raise ValueError(f"Sessions for the bucket starting {self.start} were evicted")
+        with open(self.path, encoding="utf-8") as spill_file:
+            return [SessionHistory.parse_session(line) for line in spill_file]
+
+class SessionHistory:
+    """Completed parking sessions, bucketed by exit time
+
+    Each bucket of `bucket` length is a SessionSegment. Once more than max_segments
+    segments hold their sessions in memory, the oldest is written to
+    spill_directory, or dropped down to its count and revenue if there is none.
+    Queries only visit the buckets that can hold matching sessions.
+    """
+    def __init__(self, bucket: timedelta = timedelta(hours=1), max_segments: Optional[int] = 48,
+                 spill_directory: Optional[str] = None):
+        self.bucket = bucket
+        self.max_segments = max_segments
+        self.spill_directory = spill_directory
+        self.segments: Dict[int, SessionSegment] = {}
+        self.longest_stay = timedelta(0)
+        self._keys: List[int] = []
+        self._resident: Deque[int] = deque()
+        if spill_directory:
+            os.makedirs(spill_directory, exist_ok=True)
+
+    def add(self, session: CompletedSession) -> None:
+        """File a completed session under the bucket of its exit time"""
+        key = self._key(session.exit_time)
+        segment = self.segments.get(key)
+        if segment is None:
+            segment = self.segments[key] = SessionSegment(EPOCH + key * self.bucket)
+            if not self._keys or key > self._keys[-1]:
+                self._keys.append(key)
+            else:
+                insort(self._keys, key)
+            self._resident.append(key)
+            if self.max_segments is not None and len(self._resident) > self.max_segments:
+                self._retire(self._resident.popleft())
+        segment.add(session)
+        self.longest_stay = max(self.longest_stay, session.exit_time - session.entry_time)
+
+    def sessions_between(self, start: datetime, end: datetime) -> Iterator[CompletedSession]:
+        """Sessions whose stay overlapped [start, end]
+
+        A session that overlaps the window left at or after start and at most
+        longest_stay after end, so only those buckets are read. Raises ValueError
+        up front, before anything is yielded, if one of them was evicted.
+        """
+        segments = list(self._segments(start, end + self.longest_stay))
+        self._require_sessions(segments)
+        return (session for segment in segments for session in segment.load()
+                if session.exit_time >= start and session.entry_time <= end)
+
+    def revenue(self, start: datetime, end: datetime) -> float:
+        """Fees of sessions that ended in [start, end)
+
+        Buckets entirely inside the window use their running totals; only the
+        buckets at either edge are read session by session, so only those must
+        not have been evicted.
+        """
+        whole, partial = [], []
+        for segment in self._segments(start, end):
+            if segment.start >= start and segment.start + self.bucket <= end:
+                whole.append(segment)
+            else:
+                partial.append(segment)
+        self._require_sessions(partial)
+        return (sum(segment.revenue for segment in whole)
+                + sum(session.fee for segment in partial for session in segment.load()
+                      if start <= session.exit_time < end))
 
-    def _resize(self) -> None:
-        """Resize array when full"""
-        new_spots = [None] * (len(self._spots) * 2)
-        for i in range(self._size):
-            new_spots[i] = self._spots[i]
-        self._spots = new_spots
+    def session_count(self) -> int:
+        return sum(segment.count for segment in self.segments.values())
+
+    def _segments(self, start: datetime, end: datetime) -> Iterator[SessionSegment]:
+        keys = self._keys
+        for key in keys[bisect_left(keys, self._key(start)):bisect_right(keys, self._key(end))]:
+            yield self.segments[key]
+
+    def _key(self, moment: datetime) -> int:
+        return (moment - EPOCH) // self.bucket
+
+    @staticmethod
+    def _require_sessions(segments: List[SessionSegment]) -> None:
+        evicted = [segment for segment in segments if segment.sessions is None and segment.path is None]
+        if evicted:
+            raise ValueError(f"Sessions for {len(evicted)} bucket(s) from {evicted[0].start} were evicted; "
+                             f"give the history a spill_directory to keep them")
+
+    def _retire(self, key: int) -> None:
+        segment = self.segments[key]
+        if self.spill_directory:
+            segment.path = os.path.join(self.spill_directory, f"sessions-{key}.tsv")
+            with open(segment.path, "w", encoding="utf-8") as spill_file:
+                spill_file.writelines(map(self.format_session, segment.sessions))
+        segment.sessions = None
+
+    @staticmethod
+    def format_session(session: CompletedSession) -> str:
+        return (f"{session.vehicle_id}\t{session.spot_id}\t{session.entry_time.isoformat()}\t"
+                f"{session.exit_time.isoformat()}\t{session.fee!r}\n")
+
+    @staticmethod
+    def parse_session(line: str) -> CompletedSession:
+        vehicle_id, spot_id, entry_time, exit_time, fee = line.rstrip("\n").split("\t")
+        return CompletedSession(vehicle_id, spot_id, datetime.fromisoformat(entry_time),
+                                datetime.fromisoformat(exit_time), float(fee))
+
+class SimulatedClock:
+    """Manually advanced clock that can stand in for datetime.now"""
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, delta: timedelta) -> None:
+        self.now += delta
+
+    def set(self, now: datetime) -> None:
+        self.now = now
 
 class ParkingLotManager:
-    """Manages parking operations using Python's built-in list"""
-    def __init__(self):
+    """Manages parking operations using Python's built-in list
+
+    Only sessions still in progress are held in active_records, one per occupied
+    spot and indexed by vehicle too; released sessions move to the time-bucketed history.
+    """
+    def __init__(self, clock: Callable[[], datetime] = datetime.now, sink: Optional[EventSink] = None,
+                 tariff: Optional[TariffEngine] = None, history: Optional[SessionHistory] = None):
+        self.clock = clock
+        self.sink = sink or ConsoleSink()
+        self.tariff = tariff or get_tariff("parkinglot")
+        self.history = history or SessionHistory()
         self.parking_spots: List[ParkingSpot] = []
-        self.parking_records: List[ParkingRecord] = []
+        self.active_records: Dict[str, ParkingRecord] = {}
+        self._active_by_vehicle: Dict[str, ParkingRecord] = {}
+        self._spots_by_id: Dict[str, ParkingSpot] = {}
+        self._free_spots: Dict[SpotType, Deque[ParkingSpot]] = {spot_type: deque() for spot_type in SpotType}
+        self._total_by_type: Dict[SpotType, int] = {spot_type: 0 for spot_type in SpotType}
+        self._occupied_by_type: Dict[SpotType, int] = {spot_type: 0 for spot_type in SpotType}
 
     def add_parking_spot(self, spot_id: str, spot_type: SpotType, base_rate: float) -> None:
         """Add a new parking spot"""
-        self.parking_spots.append(ParkingSpot(spot_id, spot_type, base_rate))
-        print(f"Added new {spot_type.value} parking spot {spot_id} with base rate ${base_rate}/hour")
+        spot = ParkingSpot(spot_id, spot_type, base_rate)
+        if not self._register_spot(spot):
+            raise ValueError(f"Parking spot {spot_id} already exists")
+        self.sink.emit("spot_added", "Added new {spot_type} parking spot {spot_id} with base rate ${base_rate}/hour",
+                       spot_id=spot_id, spot_type=spot_type.value, base_rate=base_rate)
+
+    def _register_spot(self, spot: ParkingSpot) -> bool:
+        """Index a new spot and, if it is available, add it to its free pool; False if the id is taken"""
+        if spot.spot_id in self._spots_by_id:
+            return False
+        self.parking_spots.append(spot)
+        self._spots_by_id[spot.spot_id] = spot
+        self._total_by_type[spot.type] += 1
+        if spot.available:
+            self._free_spots[spot.type].append(spot)
+        else:
+            self._occupied_by_type[spot.type] += 1
+        return True
+
+    def get_spot(self, spot_id: str) -> Optional[ParkingSpot]:
+        """Look up a parking spot by its ID"""
+        return self._spots_by_id.get(spot_id)
 
     def find_available_spot(self, spot_type: SpotType) -> Optional[ParkingSpot]:
         """Find an available parking spot of the specified type"""
-        for spot in self.parking_spots:
-            if spot.type == spot_type and spot.available:
-                return spot
-        return None
+        return self._peek_free_spot(spot_type)
+
+    def _peek_free_spot(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        pool = self._free_spots[spot_type]
+        # Drop spots that were marked unavailable outside of the manager
+        while pool and not pool[0].available:
+            pool.popleft()
+        return pool[0] if pool else None
+
+    def _claim_spot(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        """Take the next free spot of a type out of its pool and mark it occupied"""
+        spot = self._peek_free_spot(spot_type)
+        if spot:
+            self._free_spots[spot_type].popleft()
+            spot.available = False
+            self._occupied_by_type[spot_type] += 1
+        return spot
+
+    def _return_spot(self, spot: ParkingSpot) -> bool:
+        """Mark an occupied spot free and put it back in its pool; False if it was already free"""
+        if spot.available:
+            return False
+        spot.available = True
+        self._free_spots[spot.type].append(spot)
+        self._occupied_by_type[spot.type] -= 1
+        return True
 
     def park_vehicle(self, vehicle_id: str, spot_type: SpotType) -> ParkingRecord:
         """Park a vehicle in an available spot"""
-        spot = self.find_available_spot(spot_type)
+        if vehicle_id in self._active_by_vehicle:
+            raise ValueError(f"Vehicle {vehicle_id} is already parked")
+        spot = self._claim_spot(spot_type)
         if not spot:
             raise ValueError(f"No available parking spots of type: {spot_type}")
         
-        spot.available = False
-        record = ParkingRecord(vehicle_id, spot.spot_id, datetime.now())
-        self.parking_records.append(record)
-        print(f"Vehicle {vehicle_id} parked in {spot_type.value} spot {spot.spot_id}")
+        record = ParkingRecord(vehicle_id, spot.spot_id, self.clock())
+        if not self._open_session(record):
+            # Another gate parked the same vehicle in the meantime
+            self._return_spot(spot)
+            raise ValueError(f"Vehicle {vehicle_id} is already parked")
+        self.sink.emit("vehicle_parked", "Vehicle {vehicle_id} parked in {spot_type} spot {spot_id}",
+                       vehicle_id=vehicle_id, spot_id=spot.spot_id, spot_type=spot_type.value)
         return record
 
+    def release_vehicle(self, record: ParkingRecord, fee: float) -> ParkingSpot:
+        """Free the spot held by a parking record and file the session, with its fee, in the history"""
+        spot = self._spots_by_id.get(record.spot_id)
+        if not spot:
+            raise ValueError(f"Unknown parking spot: {record.spot_id}")
+        if not self._close_session(record, fee):
+            raise ValueError(f"Parking record for {record.vehicle_id} in spot {spot.spot_id} is not active")
+        if not self._return_spot(spot):
+            raise ValueError(f"Parking spot {spot.spot_id} is not occupied")
+
+        self.sink.emit("vehicle_released", "Vehicle {vehicle_id} left {spot_type} spot {spot_id}",
+                       vehicle_id=record.vehicle_id, spot_id=spot.spot_id, spot_type=spot.type.value)
+        return spot
+
+    def exit_vehicle(self, vehicle_id: str) -> float:
+        """Settle the fee for a parked vehicle by plate, free its spot and retire its record"""
+        record = self._active_by_vehicle.get(vehicle_id)
+        if not record:
+            raise ValueError(f"Vehicle {vehicle_id} is not parked")
+        fee = self.calculate_fee(record)
+        self.release_vehicle(record, fee)
+        return fee
+
+    def active_record(self, vehicle_id: str) -> Optional[ParkingRecord]:
+        """The in-progress parking record of a vehicle, if it is parked"""
+        return self._active_by_vehicle.get(vehicle_id)
+
+    def _open_session(self, record: ParkingRecord) -> bool:
+        """Index a new record; False if its vehicle already has an active session"""
+        # setdefault checks and inserts the plate in one step, so two gates cannot both win it
+        if self._active_by_vehicle.setdefault(record.vehicle_id, record) is not record:
+            return False
+        self.active_records[record.spot_id] = record
+        return True
+
+    def _close_session(self, record: ParkingRecord, fee: float) -> bool:
+        """Move an active record into the history; False if it is not the spot's active record"""
+        if not self._retire_record(record):
+            return False
+        self._file_session(CompletedSession(record.vehicle_id, record.spot_id, record.entry_time, self.clock(), fee))
+        return True
+
+    def _retire_record(self, record: ParkingRecord) -> bool:
+        if self.active_records.get(record.spot_id) is not record:
+            return False
+        del self.active_records[record.spot_id]
+        del self._active_by_vehicle[record.vehicle_id]
+        return True
+
+    def _file_session(self, session: CompletedSession) -> None:
+        self.history.add(session)
+
     def calculate_fee(self, record: ParkingRecord) -> float:
         """Calculate parking fee with dynamic pricing"""
-        exit_time = datetime.now()
+        exit_time = self.clock()
         duration = exit_time - record.entry_time
         hours = duration.total_seconds() / 3600
         hours = int(hours) + (1 if duration.total_seconds() % 3600 > 0 else 0)
 
-        spot = next(spot for spot in self.parking_spots if spot.spot_id == record.spot_id)
+        spot = self._spots_by_id[record.spot_id]
         base_rate = spot.base_rate
-        occupancy_rate = self._calculate_occupancy_rate(spot.type)
+        occupancy_rate = self.occupancy_snapshot()[spot.type]
 
-        time_factor = self._calculate_time_factor(record.entry_time)
-        occupancy_factor = self._calculate_occupancy_factor(occupancy_rate)
+        tariff = self.tariff.current
+        time_factor = tariff.time_factor(record.entry_time)
+        occupancy_factor = tariff.occupancy_factor(occupancy_rate)
 
         fee = base_rate * hours * time_factor * occupancy_factor
         
-        print(f"\nParking Fee Breakdown for vehicle {record.vehicle_id}:")
-        print(f"Duration: {hours} hours")
-        print(f"Base rate: ${base_rate}/hour")
-        print(f"Time factor: {time_factor}x (based on parking time)")
-        print(f"Occupancy factor: {occupancy_factor}x (based on {occupancy_rate:.1%} occupancy)")
-        print(f"Total fee: ${fee:.2f}")
+        self.sink.emit("fee_calculated", FEE_BREAKDOWN, vehicle_id=record.vehicle_id, spot_id=record.spot_id,
+                       hours=hours, base_rate=base_rate, time_factor=time_factor,
+                       occupancy_factor=occupancy_factor, occupancy_rate=occupancy_rate, fee=fee)
         
         return fee
 
-    def _calculate_time_factor(self, time: datetime) -> float:
-        """Calculate time-based pricing factor"""
-        hour = time.hour
-        if 9 <= hour <= 17:
-            return 1.5
-        if hour >= 22 or hour <= 6:
-            return 0.7
-        return 1.0
-
-    def _calculate_occupancy_factor(self, occupancy_rate: float) -> float:
-        """Calculate occupancy-based pricing factor"""
-        if occupancy_rate >= 0.8:
-            return 1.5
-        elif occupancy_rate >= 0.5:
-            return 1.2
-        return 1.0 
+    def calculate_fees(self, records: List[ParkingRecord], exit_time: Optional[datetime] = None,
+                       breakdown: bool = False) -> Tuple[array, Optional[List[Dict[str, Any]]]]:
+        """Settle many records in one pass, with the same results as calculate_fee
+
+        Time factors come from the tariff's hour-of-week table and occupancy factors
+        from one occupancy snapshot, so each record costs a few lookups. Returns the fees as
+        an array of doubles and, if requested, one breakdown row per record.
+        """
+        exit_time = exit_time or self.clock()
+        tariff = self.tariff.current
+        time_table = tariff.time_table
+        snapshot = self.occupancy_snapshot()
+        occupancy_factors = {spot_type: tariff.occupancy_factor(rate) for spot_type, rate in snapshot.items()}
+        spots = self._spots_by_id
+
+        fees = array("d")
+        rows: Optional[List[Dict[str, Any]]] = [] if breakdown else None
+        for record in records:
+            seconds = (exit_time - record.entry_time).total_seconds()
+            hours = int(seconds / 3600) + (1 if seconds % 3600 > 0 else 0)
+            spot = spots[record.spot_id]
+            entry_time = record.entry_time
+            time_factor = time_table[entry_time.weekday() * 24 + entry_time.hour]
+            occupancy_factor = occupancy_factors[spot.type]
+            fee = spot.base_rate * hours * time_factor * occupancy_factor
+            fees.append(fee)
+            if rows is not None:
+                rows.append({"vehicle_id": record.vehicle_id, "spot_id": record.spot_id, "hours": hours,
+                             "base_rate": spot.base_rate, "time_factor": time_factor,
+                             "occupancy_factor": occupancy_factor, "occupancy_rate": snapshot[spot.type],
+                             "fee": fee})
+
+        self.sink.emit("fees_settled", "Settled {count} parking fees totalling ${total:.2f}",
+                       count=len(fees), total=sum(fees))
+        return fees, rows
 
     def _calculate_occupancy_rate(self, spot_type: SpotType) -> float:
         """Calculate current occupancy rate for a specific spot type"""
-        total_spots = sum(1 for spot in self.parking_spots if spot.type == spot_type)
+        total_spots = self._total_by_type[spot_type]
         if total_spots == 0:
             return 0.0
-        
-        occupied_spots = sum(1 for spot in self.parking_spots 
-                           if spot.type == spot_type and not spot.available)
-        return occupied_spots / total_spots
+        return self._occupied_by_type[spot_type] / total_spots
+
+    def occupancy_snapshot(self) -> Dict[SpotType, float]:
+        """Current occupancy rate of every spot type, from the maintained counters"""
+        return {spot_type: self._calculate_occupancy_rate(spot_type) for spot_type in SpotType}
 
     def display_status(self):
         """Display current status of the parking lot"""
         print("\nParking Lot Status:")
         print("------------------")
         for spot_type in SpotType:
-            total = sum(1 for spot in self.parking_spots if spot.type == spot_type)
-            available = sum(1 for spot in self.parking_spots 
-                          if spot.type == spot_type and spot.available)
+            total = self._total_by_type[spot_type]
+            available = total - self._occupied_by_type[spot_type]
             if total > 0:
                 print(f"{spot_type.value.capitalize()} spots: {available}/{total} available")
 
+class ConcurrentParkingLotManager(ParkingLotManager):
+    """ParkingLotManager that can be shared by many gate threads
+
+    Each SpotType's free pool and counters are guarded by their own lock, so gates
+    parking different types never contend, and claiming a spot is a single atomic
+    pop-and-mark under that lock, so no spot can be handed out twice. Plates are
+    claimed with an atomic dict setdefault, exits retire their record under the
+    spot type's lock, and only the history write shares one lock across gates.
+    """
+    def __init__(self, clock: Callable[[], datetime] = datetime.now, sink: Optional[EventSink] = None,
+                 tariff: Optional[TariffEngine] = None, history: Optional[SessionHistory] = None):
+        super().__init__(clock, sink, tariff, history)
+        self._type_locks: Dict[SpotType, threading.Lock] = {spot_type: threading.Lock() for spot_type in SpotType}
+        self._index_lock = threading.Lock()
+        self._history_lock = threading.Lock()
+
+    def _register_spot(self, spot: ParkingSpot) -> bool:
+        with self._index_lock, self._type_locks[spot.type]:
+            return super()._register_spot(spot)
+
+    def find_available_spot(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        with self._type_locks[spot_type]:
+            return super().find_available_spot(spot_type)
+
+    def _claim_spot(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        with self._type_locks[spot_type]:
+            return super()._claim_spot(spot_type)
+
+    def _return_spot(self, spot: ParkingSpot) -> bool:
+        with self._type_locks[spot.type]:
+            return super()._return_spot(spot)
+
+    def _retire_record(self, record: ParkingRecord) -> bool:
+        # Only exits of spots of the same type contend for the check-and-remove
+        with self._type_locks[self._spots_by_id[record.spot_id].type]:
+            return super()._retire_record(record)
+
+    def _file_session(self, session: CompletedSession) -> None:
+        # Taken after the spot and index locks are released, so spill I/O never blocks a park
+        with self._history_lock:
+            super()._file_session(session)
+
 def main():
-    manager = ParkingLotManager()
+    clock = SimulatedClock(datetime.now())
+    manager = ParkingLotManager(clock=clock)
     
     print("Initializing Parking Lot Management System...")
     print("-------------------------------------------")
@@ -176,8 +610,8 @@ def main():
         print("\nUpdated status:")
         manager.display_status()
         print("\nSimulating 2.5 hours passing...")
-        record1.entry_time = datetime.now() - timedelta(hours=2, minutes=30)
-        fee1 = manager.calculate_fee(record1)
+        clock.advance(timedelta(hours=2, minutes=30))
+        fee1 = manager.exit_vehicle("CAR123")
         print("\nTrying to park another standard vehicle...")
         record3 = manager.park_vehicle("CAR456", SpotType.STANDARD)
         
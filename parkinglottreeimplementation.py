@@ -1,67 +1,140 @@
+from tariffs import get_tariff
+
 class ParkingNode:
-    def __init__(self, name, base_price=0, parent=None):
+    __slots__ = ("name", "base_price", "parent", "children", "occupancy", "capacity",
+                 "tariff", "cached_price", "cached_tariff", "price_dirty")
+
+    def __init__(self, name, base_price=0, parent=None, tariff=None):
         self.name = name
         self.base_price = base_price
         self.parent = parent
+        self.tariff = tariff or get_tariff("parkinglottreeimplementation")
         self.children = []
         self.occupancy = 0
         self.capacity = 0
+        self.cached_price = None
+        self.cached_tariff = None
+        self.price_dirty = True
 
     def add_child(self, child):
         child.parent = self
         self.children.append(child)
 
-    def calculate_dynamic_price(self):
+    def calculate_dynamic_price(self, tariff=None):
 
         occupancy_rate = self.occupancy / self.capacity if self.capacity > 0 else 0
 
-        multiplier = 1 + (0.5 * occupancy_rate)
+        multiplier = (tariff or self.tariff.current).occupancy_factor(occupancy_rate)
         return round(self.base_price * multiplier, 2)
 
+    def current_price(self):
+        """Dynamic price, recomputed only after occupancy, capacity or the tariff changed"""
+        tariff = self.tariff.current
+        if self.price_dirty or self.cached_tariff is not tariff:
+            self.cached_price = self.calculate_dynamic_price(tariff)
+            self.cached_tariff = tariff
+            self.price_dirty = False
+        return self.cached_price
+
     def update_occupancy(self, value):
-        self.occupancy = value
-  
-        if self.parent:
-            parent_total_occupancy = sum(child.occupancy for child in self.parent.children)
-            self.parent.update_occupancy(parent_total_occupancy)
+        self.propagate_occupancy(value - self.occupancy)
+
+    def propagate_occupancy(self, delta):
+        """Add delta to this node's occupancy and every ancestor's in O(depth)"""
+        current = self
+        while current:
+            current.occupancy += delta
+            current.price_dirty = True
+            current = current.parent
 
 class ParkingTree:
-    def __init__(self):
-        self.root = ParkingNode("Parking Lot")
+    def __init__(self, tariff=None):
+        self.tariff = tariff or get_tariff("parkinglottreeimplementation")
+        self.root = ParkingNode("Parking Lot", tariff=self.tariff)
 
     def add_zone(self, zone_name, base_price):
-        zone = ParkingNode(zone_name, base_price)
+        zone = ParkingNode(zone_name, base_price, tariff=self.tariff)
         self.root.add_child(zone)
         return zone
 
     def add_floor(self, zone, floor_name, base_price):
-        floor = ParkingNode(floor_name, base_price)
+        floor = ParkingNode(floor_name, base_price, tariff=self.tariff)
         zone.add_child(floor)
         return floor
 
     def add_spot(self, floor, spot_name, base_price):
-        spot = ParkingNode(spot_name, base_price)
+        spot = ParkingNode(spot_name, base_price, tariff=self.tariff)
         spot.capacity = 1
         floor.add_child(spot)
   
         current = floor
         while current:
             current.capacity += 1
+            current.price_dirty = True
             current = current.parent
         return spot
 
+    def update_occupancies(self, changes):
+        """Apply many (spot, new_occupancy) changes, touching each shared ancestor once"""
+        # levels[d] maps each pending ancestor at depth d to its combined delta
+        levels = {}
+        depths = {}
+        for node, value in changes:
+            delta = value - node.occupancy
+            node.occupancy = value
+            node.price_dirty = True
+            parent = node.parent
+            if parent and delta:
+                if parent not in depths:
+                    depths[parent] = self._depth(parent)
+                level = levels.setdefault(depths[parent], {})
+                level[parent] = level.get(parent, 0) + delta
+
+        for depth in range(max(levels, default=-1), -1, -1):
+            for node, delta in levels.get(depth, {}).items():
+                node.occupancy += delta
+                node.price_dirty = True
+                if node.parent and delta:
+                    level = levels.setdefault(depth - 1, {})
+                    level[node.parent] = level.get(node.parent, 0) + delta
+
+    @staticmethod
+    def _depth(node):
+        depth = 0
+        while node.parent:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def iter_structure(self, node=None, level=0):
+        """Yield (node, level) pairs in pre-order without recursion"""
+        stack = [(node or self.root, level)]
+        while stack:
+            node, level = stack.pop()
+            yield node, level
+            stack.extend((child, level + 1) for child in reversed(node.children))
+
+    def export_structure(self, node=None):
+        """Flat pre-order snapshot of the hierarchy; only dirty nodes are re-priced"""
+        return [
+            {
+                "name": node.name,
+                "level": level,
+                "base_price": node.base_price,
+                "current_price": node.current_price(),
+                "occupancy": node.occupancy,
+                "capacity": node.capacity,
+            }
+            for node, level in self.iter_structure(node)
+        ]
+
     def display_structure(self, node=None, level=0):
-        if node is None:
-            node = self.root
-        
-        indent = "  " * level
-        price_info = f" (Base: ${node.base_price}, Current: ${node.calculate_dynamic_price()})" if node.base_price > 0 else ""
-        occupancy_info = f" [Occupancy: {node.occupancy}/{node.capacity}]" if node.capacity > 0 else ""
-        
-        print(f"{indent}{node.name}{price_info}{occupancy_info}")
-        
-        for child in node.children:
-            self.display_structure(child, level + 1)
+        for node, level in self.iter_structure(node, level):
+            indent = "  " * level
+            price_info = f" (Base: ${node.base_price}, Current: ${node.current_price()})" if node.base_price > 0 else ""
+            occupancy_info = f" [Occupancy: {node.occupancy}/{node.capacity}]" if node.capacity > 0 else ""
+
+            print(f"{indent}{node.name}{price_info}{occupancy_info}")
 
 def main():
 
@@ -87,8 +160,7 @@ def main():
 
     spots_p1[0].update_occupancy(1)
     spots_p1[1].update_occupancy(1)
-    spots_s1[0].update_occupancy(1) 
-    spots_s1[1].update_occupancy(1)
+    parking_lot.update_occupancies([(spots_s1[0], 1), (spots_s1[1], 1)])
     print("\nParking Lot Structure After Some Activity:")
     parking_lot.display_structure()
 
@@ -0,0 +1,268 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from events import EventSink
+from parkinglot import (SPOT_TYPE_CODES, SPOT_TYPES, ParkingLotManager, ParkingRecord, ParkingSpot, SessionHistory,
+                        SpotType)
+from tariffs import TariffEngine
+
+ADD = "A"
+PARK = "P"
+EXIT = "X"
+OP_FIELDS = {ADD: 3, PARK: 3, EXIT: 2}
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+SNAPSHOT_MAGIC = b"PLSNAP1\0"
+SNAPSHOT_HEADER = struct.Struct("<8sQQQ")  # magic, last lsn, spot count, record count
+SNAPSHOT_SPOT = struct.Struct("<IHBBd")    # id offset, id length, type code, available, base rate
+SNAPSHOT_RECORD = struct.Struct("<IHIHq")  # vehicle offset/length, spot offset/length, entry time (us)
+
+def to_micros(moment: datetime) -> int:
+    return (moment - EPOCH) // MICROSECOND
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + timedelta(microseconds=micros)
+
+class WriteAheadLog:
+    """Append-only, tab-separated operation log with group commit
+
+    Entries are buffered and made durable together with one fsync once
+    group_commit_size entries are pending or group_commit_interval seconds have
+    passed since the last commit, or when commit() is called explicitly. A
+    background flusher commits pending entries after a quiet period, so at most
+    about group_commit_interval seconds of acknowledged operations can be lost.
+    """
+    def __init__(self, path: str, group_commit_size: int = 256, group_commit_interval: float = 0.05):
+        self.path = path
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def append(self, lsn: int, op: str, *fields) -> None:
+        with self._lock:
+            self._file.write("\t".join([str(lsn), op, *map(str, fields)]) + "\n")
+            self._pending += 1
+            if (self._pending >= self.group_commit_size
+                    or time.monotonic() - self._last_commit >= self.group_commit_interval):
+                self.commit()
+
+    def commit(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._pending = 0
+            self._last_commit = time.monotonic()
+
+    def truncate(self) -> None:
+        """Drop every entry; only call once a snapshot covers them"""
+        with self._lock:
+            self.commit()
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._closed.set()
+        self._flusher.join()
+        self.commit()
+        self._file.close()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.group_commit_interval):
+            with self._lock:
+                if self._pending and time.monotonic() - self._last_commit >= self.group_commit_interval:
+                    self.commit()
+
+    @staticmethod
+    def parse(line: bytes) -> Optional[Tuple[int, str, List[str]]]:
+        """Decode one raw log line into (lsn, op, fields), or None if it is torn or malformed"""
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            lsn, op, *fields = line[:-1].decode("utf-8").split("\t")
+            lsn = int(lsn)
+        except ValueError:
+            return None
+        if OP_FIELDS.get(op) != len(fields):
+            return None
+        return lsn, op, fields
+
+    @staticmethod
+    def replay(path: str, after_lsn: int = 0) -> Iterator[Tuple[int, str, List[str]]]:
+        """Yield (lsn, op, fields) for entries newer than after_lsn, up to the first bad one"""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as log_file:
+            for line in log_file:
+                entry = WriteAheadLog.parse(line)
+                if entry is None:
+                    # Torn final write from a crash; nothing after it was acknowledged
+                    break
+                if entry[0] > after_lsn:
+                    yield entry
+
+    @staticmethod
+    def repair(path: str) -> None:
+        """Cut the log back to the end of its last good entry, so new appends start on a fresh line"""
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as log_file:
+            end = 0
+            for line in log_file:
+                if WriteAheadLog.parse(line) is None:
+                    break
+                end += len(line)
+            if end < log_file.seek(0, os.SEEK_END):
+                log_file.truncate(end)
+                os.fsync(log_file.fileno())
+
+def write_snapshot(path: str, lsn: int, spots: List[ParkingSpot], records: List[ParkingRecord]) -> None:
+    """Write a compact binary snapshot atomically (temp file, fsync, rename)"""
+    strings = bytearray()
+
+    def intern(text: str) -> Tuple[int, int]:
+        encoded = text.encode("utf-8")
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    body = bytearray()
+    for spot in spots:
+        body += SNAPSHOT_SPOT.pack(*intern(spot.spot_id), SPOT_TYPE_CODES[spot.type], spot.available, spot.base_rate)
+    for record in records:
+        body += SNAPSHOT_RECORD.pack(*intern(record.vehicle_id), *intern(record.spot_id), to_micros(record.entry_time))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, lsn, len(spots), len(records)))
+        snapshot_file.write(body)
+        snapshot_file.write(strings)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temp_path, path)
+
+def read_snapshot(path: str) -> Tuple[int, List[ParkingSpot], List[ParkingRecord]]:
+    """Memory-map a snapshot and decode its spots and active records without copying the file"""
+    with open(path, "rb") as snapshot_file, mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, lsn, spot_count, record_count = SNAPSHOT_HEADER.unpack_from(mapped)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a parking lot snapshot")
+        spots_start = SNAPSHOT_HEADER.size
+        records_start = spots_start + spot_count * SNAPSHOT_SPOT.size
+        strings_start = records_start + record_count * SNAPSHOT_RECORD.size
+
+        # Every view into the map must be released before it can close
+        with memoryview(mapped) as view, view[spots_start:records_start] as spot_rows, \
+                view[records_start:strings_start] as record_rows, view[strings_start:] as strings:
+            spots = []
+            for offset, length, type_code, available, base_rate in SNAPSHOT_SPOT.iter_unpack(spot_rows):
+                spot = ParkingSpot(str(strings[offset:offset + length], "utf-8"), SPOT_TYPES[type_code], base_rate)
+                spot.available = bool(available)
+                spots.append(spot)
+
+            records = [
+                ParkingRecord(str(strings[vehicle_offset:vehicle_offset + vehicle_length], "utf-8"),
+                              str(strings[spot_offset:spot_offset + spot_length], "utf-8"),
+                              from_micros(entry_micros))
+                for vehicle_offset, vehicle_length, spot_offset, spot_length, entry_micros
+                in SNAPSHOT_RECORD.iter_unpack(record_rows)
+            ]
+    return lsn, spots, records
+
+class DurableParkingLotManager(ParkingLotManager):
+    """ParkingLotManager that logs every add, park and exit to a write-ahead log
+
+    State lives in directory as snapshot.bin plus wal.log. Every snapshot_every
+    logged operations a new snapshot is written and the log is truncated, so
+    recovery maps the snapshot and replays only the short log tail.
+    Entry times are stored as naive datetimes with microsecond precision.
+    """
+    WAL_FILE = "wal.log"
+    SNAPSHOT_FILE = "snapshot.bin"
+
+    def __init__(self, directory: str, clock: Callable[[], datetime] = datetime.now,
+                 sink: Optional[EventSink] = None, group_commit_size: int = 256, snapshot_every: int = 100_000,
+                 tariff: Optional[TariffEngine] = None, history: Optional[SessionHistory] = None):
+        super().__init__(clock, sink, tariff, history)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.lsn = 0
+        self._ops_since_snapshot = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        wal_path = os.path.join(directory, self.WAL_FILE)
+        WriteAheadLog.repair(wal_path)
+        self.wal = WriteAheadLog(wal_path, group_commit_size)
+
+    def add_parking_spot(self, spot_id: str, spot_type: SpotType, base_rate: float) -> None:
+        super().add_parking_spot(spot_id, spot_type, base_rate)
+        self._log(ADD, spot_id, spot_type.value, repr(base_rate))
+
+    def park_vehicle(self, vehicle_id: str, spot_type: SpotType) -> ParkingRecord:
+        record = super().park_vehicle(vehicle_id, spot_type)
+        self._log(PARK, vehicle_id, record.spot_id, to_micros(record.entry_time))
+        return record
+
+    def release_vehicle(self, record: ParkingRecord, fee: float) -> ParkingSpot:
+        spot = super().release_vehicle(record, fee)
+        self._log(EXIT, record.vehicle_id, record.spot_id)
+        return spot
+
+    def checkpoint(self) -> None:
+        """Write a snapshot of the current state and truncate the log it covers"""
+        self.wal.commit()
+        write_snapshot(os.path.join(self.directory, self.SNAPSHOT_FILE), self.lsn,
+                       self.parking_spots, list(self.active_records.values()))
+        self.wal.truncate()
+        self._ops_since_snapshot = 0
+
+    def close(self) -> None:
+        self.wal.close()
+
+    def _log(self, op: str, *fields) -> None:
+        self.lsn += 1
+        self.wal.append(self.lsn, op, *fields)
+        self._ops_since_snapshot += 1
+        if self._ops_since_snapshot >= self.snapshot_every:
+            self.checkpoint()
+
+    def _recover(self) -> None:
+        # Rebuild plain state first, then index it once, so replay stays O(log tail)
+        spots: Dict[str, ParkingSpot] = {}
+        snapshot_path = os.path.join(self.directory, self.SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            self.lsn, snapshot_spots, records = read_snapshot(snapshot_path)
+            spots = {spot.spot_id: spot for spot in snapshot_spots}
+            self.active_records = {record.spot_id: record for record in records}
+
+        for lsn, op, fields in WriteAheadLog.replay(os.path.join(self.directory, self.WAL_FILE), self.lsn):
+            self.lsn = lsn
+            if op == ADD:
+                spot_id, spot_type, base_rate = fields
+                spots[spot_id] = ParkingSpot(spot_id, SpotType(spot_type), float(base_rate))
+            elif op == PARK:
+                vehicle_id, spot_id, entry_micros = fields
+                spots[spot_id].available = False
+                self.active_records[spot_id] = ParkingRecord(vehicle_id, spot_id, from_micros(int(entry_micros)))
+            elif op == EXIT:
+                vehicle_id, spot_id = fields
+                spots[spot_id].available = True
+                self.active_records.pop(spot_id, None)
+
+        for spot in spots.values():
+            self._register_spot(spot)
+        self._active_by_vehicle = {record.vehicle_id: record for record in self.active_records.values()}
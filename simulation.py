@@ -0,0 +1,127 @@
+import argparse
+import heapq
+import random
+import time
+from datetime import datetime, timedelta
+
+from events import JsonLinesSink, NullSink
+from parkinglot import ParkingLotManager, SimulatedClock, SpotType
+
+ARRIVE = "arrive"
+DEPART = "depart"
+
+DEFAULT_LAYOUT = {
+    SpotType.STANDARD: (1000, 10.0),
+    SpotType.COMPACT: (300, 8.0),
+    SpotType.HANDICAP: (50, 8.0),
+    SpotType.ELECTRIC: (150, 15.0),
+}
+
+
+def generate_events(seed, vehicles, start, mean_gap_seconds=30.0, mean_stay_hours=2.0):
+    """Yield (timestamp, kind, vehicle_id, spot_type) events in time order from a seeded generator"""
+    rng = random.Random(seed)
+    spot_types = list(SpotType)
+    weights = [DEFAULT_LAYOUT[spot_type][0] for spot_type in spot_types]
+    departures = []
+    now = start
+
+    for i in range(vehicles):
+        now += timedelta(seconds=rng.expovariate(1.0 / mean_gap_seconds))
+        while departures and departures[0][0] <= now:
+            yield heapq.heappop(departures)
+        vehicle_id = f"CAR{i}"
+        spot_type = rng.choices(spot_types, weights)[0]
+        yield now, ARRIVE, vehicle_id, spot_type
+        stay = timedelta(hours=rng.expovariate(1.0 / mean_stay_hours))
+        heapq.heappush(departures, (now + stay, DEPART, vehicle_id, spot_type))
+
+    while departures:
+        yield heapq.heappop(departures)
+
+
+def read_events(path):
+    """Yield events from a file of 'ISO timestamp,arrive|depart,vehicle_id,spot_type' lines"""
+    with open(path) as events_file:
+        for line in events_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            timestamp, kind, vehicle_id, spot_type = line.split(",")
+            yield datetime.fromisoformat(timestamp), kind, vehicle_id, SpotType(spot_type)
+
+
+def write_events(path, events):
+    with open(path, "w") as events_file:
+        for timestamp, kind, vehicle_id, spot_type in events:
+            events_file.write(f"{timestamp.isoformat()},{kind},{vehicle_id},{spot_type.value}\n")
+
+
+def build_manager(clock, layout=DEFAULT_LAYOUT, sink=None):
+    manager = ParkingLotManager(clock=clock, sink=sink or NullSink())
+    for spot_type, (count, base_rate) in layout.items():
+        for i in range(count):
+            manager.add_parking_spot(f"{spot_type.value[0].upper()}{i}", spot_type, base_rate)
+    return manager
+
+
+def simulate(events, layout=DEFAULT_LAYOUT, start=None, sink=None):
+    """Replay events through a ParkingLotManager driven by a simulated clock"""
+    clock = SimulatedClock(start or datetime(2025, 1, 1))
+    manager = build_manager(clock, layout, sink)
+    stats = {"events": 0, "parked": 0, "rejected": 0, "departed": 0, "revenue": 0.0}
+
+    started = time.perf_counter()
+    for timestamp, kind, vehicle_id, spot_type in events:
+        clock.set(timestamp)
+        stats["events"] += 1
+        if kind == ARRIVE:
+            try:
+                manager.park_vehicle(vehicle_id, spot_type)
+                stats["parked"] += 1
+            except ValueError:
+                stats["rejected"] += 1
+        elif manager.active_record(vehicle_id):
+            # Departures whose arrival was turned away have no active record
+            stats["revenue"] += manager.exit_vehicle(vehicle_id)
+            stats["departed"] += 1
+    stats["seconds"] = time.perf_counter() - started
+
+    stats["events_per_second"] = stats["events"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay parking traffic faster than real time")
+    parser.add_argument("--events-file", help="read events from this file instead of generating them")
+    parser.add_argument("--write-events", help="write the generated events to this file and exit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--vehicles", type=int, default=100_000)
+    parser.add_argument("--log-events", help="write every operation event to this file as JSON lines")
+    args = parser.parse_args()
+
+    start = datetime(2025, 1, 1)
+    if args.events_file:
+        events = read_events(args.events_file)
+    else:
+        events = generate_events(args.seed, args.vehicles, start)
+    if args.write_events:
+        write_events(args.write_events, events)
+        return
+
+    if args.log_events:
+        with open(args.log_events, "w") as log_file:
+            sink = JsonLinesSink(log_file)
+            stats = simulate(events, start=start, sink=sink)
+            sink.close()
+    else:
+        stats = simulate(events, start=start)
+    print(f"Events processed: {stats['events']:,}")
+    print(f"Vehicles parked: {stats['parked']:,} (rejected: {stats['rejected']:,})")
+    print(f"Vehicles departed: {stats['departed']:,}")
+    print(f"Total revenue: ${stats['revenue']:,.2f}")
+    print(f"Throughput: {stats['events_per_second']:,.0f} events/sec ({stats['seconds']:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tariffs.json")
+HOURS_PER_WEEK = 7 * 24
+OCCUPANCY_BUCKETS = 1000
+
+class CompiledTariff:
+    """A pricing policy compiled into lookup tables
+
+    Time factors live in a 168-entry hour-of-week table. Threshold occupancy
+    rules become a table of OCCUPANCY_BUCKETS buckets; buckets next to a
+    threshold hold None and fall back to the rules themselves, so a lookup
+    gives exactly the same factor as evaluating the rules. Linear policies
+    compute base + slope * rate directly.
+    """
+    def __init__(self, policy: Dict[str, Any]):
+        self.policy = policy
+        self.time_table = self._compile_time(policy.get("time", {}))
+
+        occupancy = policy.get("occupancy", {})
+        self.linear = "slope" in occupancy
+        self.base = occupancy.get("base", 1.0)
+        self.slope = occupancy.get("slope", 0.0)
+        self.default = occupancy.get("default", 1.0)
+        self.thresholds = sorted(
+            ((rule["above"], rule.get("inclusive", False), rule["factor"]) for rule in occupancy.get("thresholds", [])),
+            reverse=True,
+        )
+        self.occupancy_table = None if self.linear else self._compile_occupancy()
+
+    @staticmethod
+    def _compile_time(time_policy: Dict[str, Any]) -> List[float]:
+        table = [time_policy.get("default", 1.0)] * HOURS_PER_WEEK
+        # Earlier rules win, so apply them last
+        for rule in reversed(time_policy.get("rules", [])):
+            first_hour, last_hour = rule["hours"]
+            for day in rule.get("days", range(7)):
+                for hour in range(first_hour, last_hour + 1):
+                    table[day * 24 + hour] = rule["factor"]
+        return table
+
+    def _compile_occupancy(self) -> List[Optional[float]]:
+        table: List[Optional[float]] = [
+            self._evaluate_thresholds((bucket + 0.5) / OCCUPANCY_BUCKETS) for bucket in range(OCCUPANCY_BUCKETS)
+        ]
+        for threshold, _, _ in self.thresholds:
+            edge = int(threshold * OCCUPANCY_BUCKETS)
+            for bucket in range(edge - 1, edge + 2):
+                if 0 <= bucket < OCCUPANCY_BUCKETS:
+                    table[bucket] = None
+        return table
+
+    def _evaluate_thresholds(self, rate: float) -> float:
+        for threshold, inclusive, factor in self.thresholds:
+            if rate > threshold or (inclusive and rate == threshold):
+                return factor
+        return self.default
+
+    def time_factor(self, moment: datetime) -> float:
+        return self.time_table[moment.weekday() * 24 + moment.hour]
+
+    def occupancy_factor(self, rate: float) -> float:
+        if self.linear:
+            return self.base + self.slope * rate
+        bucket = int(rate * OCCUPANCY_BUCKETS)
+        if 0 <= bucket < OCCUPANCY_BUCKETS:
+            factor = self.occupancy_table[bucket]
+            if factor is not None:
+                return factor
+        return self._evaluate_thresholds(rate)
+
+class TariffEngine:
+    """Holds the current CompiledTariff for one pricing path
+
+    swap() compiles the new policy before replacing the reference, so readers
+    always see either the old or the new tariff in full. Pricing code should read
+    `current` once per price calculation.
+    """
+    def __init__(self, policy: Dict[str, Any]):
+        self.current = CompiledTariff(policy)
+        self._lock = threading.Lock()
+
+    def swap(self, policy: Dict[str, Any]) -> CompiledTariff:
+        compiled = CompiledTariff(policy)
+        with self._lock:
+            previous, self.current = self.current, compiled
+        return previous
+
+def load_policies(path: str = DEFAULT_CONFIG) -> Dict[str, Dict[str, Any]]:
+    with open(path) as config_file:
+        return json.load(config_file)
+
+TARIFFS: Dict[str, TariffEngine] = {name: TariffEngine(policy) for name, policy in load_policies().items()}
+
+def get_tariff(name: str) -> TariffEngine:
+    """The shared tariff engine for one pricing path, e.g. get_tariff("parkinglot")"""
+    return TARIFFS[name]
+
+def reload_tariffs(path: str = DEFAULT_CONFIG) -> None:
+    """Hot-swap every known pricing path to the policies in a config file"""
+    policies = load_policies(path)
+    unknown = set(policies) - set(TARIFFS)
+    if unknown:
+        raise ValueError(f"Unknown tariff names: {', '.join(sorted(unknown))}")
+    for name, policy in policies.items():
+        TARIFFS[name].swap(policy)